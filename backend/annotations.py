@@ -0,0 +1,44 @@
+from typing import Dict, List, Set
+
+
+def _target_ids(items: List[dict]) -> List[str]:
+    return list({item["id"] for item in items if "id" in item})
+
+
+async def liked_ids(likes, user_id: str, target_type: str, target_ids: List[str]) -> Set[str]:
+    """Which of ``target_ids`` the user liked, in one query covered by the
+    (user_id, target_id, target_type) index."""
+    if not target_ids:
+        return set()
+    docs = await likes.find(
+        {"user_id": user_id, "target_id": {"$in": target_ids}, "target_type": target_type},
+        {"_id": 0, "target_id": 1}
+    ).to_list(None)
+    return {doc["target_id"] for doc in docs}
+
+
+async def vote_types(votes, user_id: str, target_type: str, target_ids: List[str]) -> Dict[str, str]:
+    """The user's vote ("up"/"down") on each of ``target_ids`` they voted on, in one query."""
+    if not target_ids:
+        return {}
+    docs = await votes.find(
+        {"user_id": user_id, "target_id": {"$in": target_ids}, "target_type": target_type},
+        {"_id": 0, "target_id": 1, "vote_type": 1}
+    ).to_list(None)
+    return {doc["target_id"]: doc["vote_type"] for doc in docs}
+
+
+async def annotate_likes(likes, user_id: str, target_type: str, items: List[dict]) -> List[dict]:
+    """Set ``liked_by_me`` on every item of a page."""
+    liked = await liked_ids(likes, user_id, target_type, _target_ids(items))
+    for item in items:
+        item["liked_by_me"] = item.get("id") in liked
+    return items
+
+
+async def annotate_votes(votes, user_id: str, target_type: str, items: List[dict]) -> List[dict]:
+    """Set ``my_vote`` ("up", "down" or None) on every item of a page."""
+    mine = await vote_types(votes, user_id, target_type, _target_ids(items))
+    for item in items:
+        item["my_vote"] = mine.get(item.get("id"))
+    return items
@@ -3,10 +3,9 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from bson import ObjectId
-import json
-from bson import json_util
 
-from server import get_current_user, db
+from responses import BSONJSONResponse
+from server import get_current_user, db, tag_stats, view_counter
 
 articles_router = APIRouter(prefix="/api/articles", tags=["articles"])
 
@@ -148,8 +147,7 @@ async def get_articles(
         
         articles = await db.articles.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(articles))
+        return BSONJSONResponse(articles)
         
     except HTTPException:
         raise
@@ -211,14 +209,10 @@ async def get_article(article_id: str):
         
         article = articles[0]
         
-        # Incrementar visualizações
-        await db.articles.update_one(
-            {"_id": ObjectId(article_id)},
-            {"$inc": {"views": 1}}
-        )
+        # Incrementar visualizações (gravado em lote pelo view_counter)
+        view_counter.add("articles", article["_id"], key_field="_id")
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(article))
+        return BSONJSONResponse(article)
         
     except HTTPException:
         raise
@@ -260,6 +254,7 @@ async def create_article(
             article_dict["published_at"] = datetime.utcnow()
         
         result = await db.articles.insert_one(article_dict)
+        await tag_stats.record("articles", article_dict.get("tags", []))
         
         # Buscar o artigo criado
         created_article = await db.articles.find_one({"_id": result.inserted_id})
@@ -267,8 +262,7 @@ async def create_article(
         created_article["author_rank"] = current_user.get("rank")
         created_article["comments_count"] = 0
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_article))
+        return BSONJSONResponse(created_article)
         
     except HTTPException:
         raise
@@ -345,8 +339,7 @@ async def update_article(
         comments_count = await db.article_comments.count_documents({"article_id": ObjectId(article_id)})
         updated_article["comments_count"] = comments_count
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(updated_article))
+        return BSONJSONResponse(updated_article)
         
     except HTTPException:
         raise
@@ -620,8 +613,7 @@ async def create_article_comment(
         created_comment["author_username"] = current_user["username"]
         created_comment["author_rank"] = current_user.get("rank")
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_comment))
+        return BSONJSONResponse(created_comment)
         
     except HTTPException:
         raise
@@ -670,8 +662,7 @@ async def get_article_comments(
         
         comments = await db.article_comments.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(comments))
+        return BSONJSONResponse(comments)
         
     except HTTPException:
         raise
@@ -758,8 +749,7 @@ async def get_trending_articles(limit: int = 10):
             {"$limit": limit}
         ]).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(trending_articles))
+        return BSONJSONResponse(trending_articles)
         
     except Exception as e:
         raise HTTPException(
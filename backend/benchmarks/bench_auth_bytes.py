@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes read from Mongo per authenticated request, before and after
+the hot/cold split of the user document.
+
+Seeds a scratch database with users carrying a realistic profile (bio,
+skills, portfolio and showcase projects, social links) in two layouts:
+  - before: profile inline in ``users``, read with the old exclusion
+    projection (everything except password_hash / follow arrays);
+  - after: profile moved to ``user_profiles`` and ``users`` read with the
+    strict PRINCIPAL_PROJECTION whitelist.
+Reply sizes are measured with a pymongo CommandListener (BSON bytes of each
+find reply), together with lookup latency percentiles.
+
+Uso:
+    cd backend
+    python benchmarks/bench_auth_bytes.py --users 2000 --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from profiles import split_profile  # noqa: E402
+from server import PRINCIPAL_PROJECTION  # noqa: E402
+
+LEGACY_PROJECTION = {"password_hash": 0, "followers": 0, "following": 0}
+
+
+class ReplyBytes(monitoring.CommandListener):
+    def __init__(self):
+        self.finds = 0
+        self.bytes = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name == "find":
+            self.finds += 1
+            self.bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+def make_user(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "username": f"dev{i}",
+        "email": f"dev{i}@bench.dev",
+        "password_hash": "$2b$12$" + "x" * 53,
+        "pc_points": random.randint(0, 5000),
+        "pcon_points": 100,
+        "rank": "Contribuidor",
+        "is_admin": False,
+        "is_company": False,
+        "is_bot": False,
+        "is_banned": False,
+        "is_muted": False,
+        "is_silenced": False,
+        "created_at": datetime.utcnow(),
+        "last_active": datetime.utcnow(),
+        "followers_count": 0,
+        "following_count": 0,
+        "bio": "Desenvolvedor full stack apaixonado por Python e React. " * 5,
+        "location": "São Paulo, Brasil",
+        "website": f"https://dev{i}.example.com",
+        "github": f"https://github.com/dev{i}",
+        "linkedin": f"https://linkedin.com/in/dev{i}",
+        "skills": ["python", "fastapi", "react", "mongodb", "docker", "aws", "typescript", "sql"],
+        "experience": "5 anos construindo APIs e aplicações web. " * 4,
+        "achievements": ["first_join", "first_question", "first_answer", "helper", "streak_7"],
+        "portfolio_projects": [
+            {"title": f"Projeto {n}", "description": "Aplicação web com autenticação, pagamentos e dashboard. " * 3,
+             "url": f"https://github.com/dev{i}/proj{n}", "stack": ["python", "react", "mongodb"]}
+            for n in range(6)
+        ],
+        "theme_color": "#D97745",
+        "banner_image": f"https://cdn.example.com/banners/{i}.png",
+        "custom_title": "Mestre das APIs",
+        "social_links": {"twitter": f"https://x.com/dev{i}", "youtube": f"https://youtube.com/@dev{i}"},
+        "showcase_projects": [str(uuid.uuid4()) for _ in range(6)],
+        "featured_skills": ["python", "react", "mongodb"],
+    }
+
+
+async def replay(collection, projection, ids, counter):
+    counter.finds = counter.bytes = 0
+    latencies = []
+    for user_id in ids:
+        started = time.perf_counter()
+        assert await collection.find_one({"id": user_id}, projection) is not None
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "bytes_per_request": counter.bytes / counter.finds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    counter = ReplyBytes()
+    client = AsyncIOMotorClient(args.mongo_url, event_listeners=[counter])
+    db = client[f"auth_bytes_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        legacy_users = [make_user(i) for i in range(args.users)]
+        split_users, profiles = [], []
+        for user in legacy_users:
+            hot = dict(user)
+            profiles.append({"user_id": hot["id"], **split_profile(hot)})
+            split_users.append(hot)
+        await db.users_legacy.insert_many([dict(u) for u in legacy_users])
+        await db.users.insert_many(split_users)
+        await db.user_profiles.insert_many(profiles)
+        for collection in (db.users_legacy, db.users):
+            await collection.create_index("id", unique=True)
+
+        ids = [random.choice(legacy_users)["id"] for _ in range(args.requests)]
+        before = await replay(db.users_legacy, LEGACY_PROJECTION, ids, counter)
+        after = await replay(db.users, PRINCIPAL_PROJECTION, ids, counter)
+
+        for name, result in (("before (inline profile)", before), ("after (hot/cold split)", after)):
+            print(f"{name:>24}: {result['bytes_per_request']:7.0f} bytes/request, "
+                  f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+        print(f"{before['bytes_per_request'] / after['bytes_per_request']:.1f}x fewer bytes per authenticated request")
+    finally:
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: home feed reads straight from Mongo vs through FeedCache.
+
+Seeds a scratch database with users, posts and fan-out timeline entries,
+then replays feed scrolls (first page plus a few "load more" pages) of a
+skewed set of active readers through TimelineFanout.read, once without and
+once with the in-process cache. Reports p50/p99 latency, cache hit rates
+and the cache's memory estimate. The scratch database is dropped at the end.
+
+Uso (precisa de um MongoDB acessível em MONGO_URL):
+    cd backend
+    python benchmarks/bench_feed_cache.py --users 2000 --posts 20000 --reads 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from feed_cache import FeedCache  # noqa: E402
+from timeline import TimelineFanout  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def seed(db, users: int, posts: int, follows: int):
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    await db.users.insert_many([{"id": uid, "username": f"u{i}"} for i, uid in enumerate(user_ids)])
+
+    start = datetime(2025, 1, 1)
+    post_docs = []
+    for i in range(posts):
+        created = start + timedelta(seconds=i * 7)
+        post_docs.append({
+            "id": str(uuid.uuid4()),
+            "author_id": random.choice(user_ids),
+            "author_username": "bench",
+            "content": "Post de benchmark do feed " * 6,
+            "post_type": "text",
+            "likes": random.randint(0, 50),
+            "comments_count": random.randint(0, 10),
+            "metadata": {},
+            "tags": ["python"],
+            "created_at": created.replace(microsecond=0),
+            "updated_at": created.replace(microsecond=0),
+        })
+    await db.posts.insert_many(post_docs)
+
+    followers = {uid: random.sample(user_ids, follows) for uid in user_ids}
+    entries = []
+    for post in post_docs:
+        for owner in followers[post["author_id"]] + [post["author_id"]]:
+            entries.append({"owner_id": owner, "post_id": post["id"], "author_id": post["author_id"],
+                            "created_at": post["created_at"]})
+    for i in range(0, len(entries), 10000):
+        await db.timelines.insert_many(entries[i:i + 10000], ordered=False)
+    return user_ids
+
+
+async def replay(fanout: TimelineFanout, readers, pages: int):
+    latencies = []
+    for reader in readers:
+        cursor = None
+        for _ in range(pages):
+            started = time.perf_counter()
+            page = await fanout.read(reader, limit=20, cursor=cursor)
+            latencies.append(time.perf_counter() - started)
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--follows", type=int, default=50, help="followers per user")
+    parser.add_argument("--reads", type=int, default=5000, help="feed sessions replayed")
+    parser.add_argument("--pages", type=int, default=3, help="pages scrolled per session")
+    parser.add_argument("--active", type=int, default=300, help="distinct active readers")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[f"feed_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        print(f"Seeding {args.users} users, {args.posts} posts, {args.follows} followers each...")
+        user_ids = await seed(db, args.users, args.posts, args.follows)
+        await TimelineFanout(db).create_indexes()
+        await db.posts.create_index("id")
+
+        # Leitores ativos com distribuição enviesada: poucos usuários rolam o feed muitas vezes
+        active = random.sample(user_ids, min(args.active, len(user_ids)))
+        readers = random.choices(active, weights=[1 / (i + 1) for i in range(len(active))], k=args.reads)
+
+        cache = FeedCache()
+        runs = [("mongo", TimelineFanout(db)), ("feed cache", TimelineFanout(db, cache=cache))]
+        for name, fanout in runs:
+            await replay(fanout, readers[:50], args.pages)  # aquecimento
+            latencies = await replay(fanout, readers, args.pages)
+            print(f"{name:>10}: {len(latencies)} pages | p50 {percentile(latencies, 0.50) * 1000:6.2f} ms | "
+                  f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+        stats = cache.stats()
+        print(f"page hit rate {stats['page_hit_rate']:.1%} | post hit rate {stats['post_hit_rate']:.1%} | "
+              f"{stats['users']} users, {stats['posts']} posts, ~{stats['memory_bytes'] / 1024 / 1024:.1f} MB")
+    finally:
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
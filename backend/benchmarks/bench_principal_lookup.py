@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: principal lookup with and without the "ptype" JWT claim.
+
+Seeds a scratch database with users and companies, then replays a B2B-heavy
+request mix (mostly company principals, like the jobs portal) through the
+legacy users -> companies fallback and through the claim-routed lookup.
+Mongo round trips are counted with a pymongo CommandListener.
+
+Uso:
+    cd backend
+    python benchmarks/bench_principal_lookup.py --requests 5000 --company-share 0.8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from server import COMPANY_PRINCIPAL_PROJECTION, PRINCIPAL_COMPANY, PRINCIPAL_PROJECTION, PRINCIPAL_USER  # noqa: E402
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.finds = 0
+
+    def started(self, event):
+        if event.command_name == "find":
+            self.finds += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def legacy_lookup(db, user_id, ptype):
+    user = await db.users.find_one({"id": user_id}, PRINCIPAL_PROJECTION)
+    if user is None:
+        user = await db.companies.find_one({"id": user_id}, COMPANY_PRINCIPAL_PROJECTION)
+    return user
+
+
+async def claim_lookup(db, user_id, ptype):
+    if ptype == PRINCIPAL_COMPANY:
+        return await db.companies.find_one({"id": user_id}, COMPANY_PRINCIPAL_PROJECTION)
+    return await db.users.find_one({"id": user_id}, PRINCIPAL_PROJECTION)
+
+
+async def run(strategy, db, counter, traffic):
+    counter.finds = 0
+    latencies = []
+    for user_id, ptype in traffic:
+        started = time.perf_counter()
+        assert await strategy(db, user_id, ptype) is not None
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "round_trips_per_request": counter.finds / len(traffic),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--principals", type=int, default=2000)
+    parser.add_argument("--company-share", type=float, default=0.8)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(args.mongo_url, event_listeners=[counter])
+    db = client["acode_lab_bench_principals"]
+    await client.drop_database(db.name)
+
+    companies = [{"id": str(uuid.uuid4()), "name": f"empresa{i}", "email": f"c{i}@bench.dev"}
+                 for i in range(int(args.principals * args.company_share))]
+    users = [{"id": str(uuid.uuid4()), "username": f"user{i}", "email": f"u{i}@bench.dev"}
+             for i in range(args.principals - len(companies))]
+    await db.companies.insert_many(companies)
+    await db.users.insert_many(users)
+    await db.users.create_index("id", unique=True)
+    await db.companies.create_index("id", unique=True)
+
+    principals = ([(c["id"], PRINCIPAL_COMPANY) for c in companies]
+                  + [(u["id"], PRINCIPAL_USER) for u in users])
+    traffic = [random.choice(principals) for _ in range(args.requests)]
+
+    print(f"{args.requests} requests, {args.company_share:.0%} company principals")
+    for name, strategy in (("legacy users->companies", legacy_lookup), ("ptype claim", claim_lookup)):
+        result = await run(strategy, db, counter, traffic)
+        print(f"{name:>24}: {result['round_trips_per_request']:.2f} round trips/request, "
+              f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+
+    await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
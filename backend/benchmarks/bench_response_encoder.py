@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: json.loads(json_util.dumps(docs)) + JSONResponse vs BSONJSONResponse.
+
+Builds Connect-post-like documents (ObjectId, datetimes, nested metadata) and
+times rendering a page of 20, 50 and 100 documents with both approaches. Both
+outputs are decoded and compared so the benchmark also guards wire compatibility.
+
+Uso:
+    cd backend
+    python benchmarks/bench_response_encoder.py --rounds 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId, json_util
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from responses import BSONJSONResponse, orjson  # noqa: E402
+
+
+def make_post(i: int) -> dict:
+    created = datetime(2025, 1, 1) + timedelta(minutes=i, microseconds=i * 1371)
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "content": "Compartilhando meu novo projeto em FastAPI + React " * 4,
+        "post_type": "project",
+        "author_id": str(uuid.uuid4()),
+        "author_username": f"dev{i}",
+        "likes": i * 3,
+        "comments_count": i % 17,
+        "metadata": {"repo": f"https://github.com/acode/proj{i}", "stars": i, "stack": ["python", "react"]},
+        "image_url": "",
+        "tags": ["python", "fastapi", "mongodb"],
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+def legacy(docs):
+    return JSONResponse(json.loads(json_util.dumps(docs))).body
+
+
+def single_pass(docs):
+    return BSONJSONResponse(docs).body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"backend: {'orjson' if orjson is not None else 'json (stdlib)'}, {args.rounds} rounds")
+    for size in (20, 50, 100):
+        docs = [make_post(i) for i in range(size)]
+        assert json.loads(legacy(docs)) == json.loads(single_pass(docs))
+
+        old = timeit.timeit(lambda: legacy(docs), number=args.rounds) / args.rounds
+        new = timeit.timeit(lambda: single_pass(docs), number=args.rounds) / args.rounds
+        print(f"{size:>4} docs: legacy {old * 1e6:8.1f} us | BSONJSONResponse {new * 1e6:8.1f} us | {old / new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
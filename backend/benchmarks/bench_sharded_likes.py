@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent likes on one viral post, single document vs sharded counter.
+
+Creates one post in a scratch database and fires ``--likes`` increments from
+``--concurrency`` concurrent writers, first as a plain ``$inc`` on the post
+(what toggle_like_post did) and then through ShardedCounter with the post
+already promoted. Reports throughput and latency percentiles, checks that
+both counters add up, and drops the scratch database at the end.
+
+Uso (precisa de um MongoDB acessível em MONGO_URL):
+    cd backend
+    python benchmarks/bench_sharded_likes.py --likes 20000 --concurrency 200 --shards 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sharded_counter import ShardedCounter  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def hammer(increment, likes: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(likes))
+
+    async def writer():
+        for _ in remaining:
+            started = time.perf_counter()
+            await increment()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+def report(name, elapsed, latencies):
+    print(f"{name:>8}: {len(latencies) / elapsed:8.0f} likes/s | p50 {percentile(latencies, 0.50) * 1000:6.2f} ms | "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--likes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url, maxPoolSize=args.concurrency)
+    db = client[f"likes_bench_{uuid.uuid4().hex[:8]}"]
+    try:
+        post_id = str(uuid.uuid4())
+        await db.posts.insert_one({"id": post_id, "likes": 0})
+        await db.posts.create_index("id")
+
+        elapsed, latencies = await hammer(
+            lambda: db.posts.update_one({"id": post_id}, {"$inc": {"likes": 1}}), args.likes, args.concurrency
+        )
+        report("single", elapsed, latencies)
+
+        counter = ShardedCounter(db, "posts", "likes", shards=args.shards)
+        await counter.create_indexes()
+        await db.posts.update_one({"id": post_id}, {"$set": {"likes": 0, counter.flag: True}})
+        post = await db.posts.find_one({"id": post_id})
+        elapsed, latencies = await hammer(lambda: counter.increment(post, 1), args.likes, args.concurrency)
+        report("sharded", elapsed, latencies)
+
+        total = (await counter.apply([await db.posts.find_one({"id": post_id})]))[0]["likes"]
+        print(f"sharded total {total} ({'OK' if total == args.likes else 'MISMATCH'}), {args.shards} shards")
+    finally:
+        await client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent votes on one question through the API.
+
+Registers a pool of voters, then every voter fires bursts of concurrent
+up/down votes at the same question, including double-clicks of the same vote.
+It reports request latency percentiles and then checks correctness directly
+in Mongo:
+  - at most one vote document per (user, question);
+  - question.upvotes / downvotes equal the vote documents actually stored.
+
+Uso (servidor rodando e MONGO_URL/DB_NAME apontando para o mesmo banco):
+    cd backend
+    python benchmarks/load_votes.py --base-url http://localhost:8000/api --voters 30 --clicks 20
+"""
+
+import argparse
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pymongo import MongoClient
+
+
+def register_and_login(base_url: str) -> str:
+    suffix = uuid.uuid4().hex[:10]
+    email = f"voter_{suffix}@loadtest.dev"
+    requests.post(f"{base_url}/auth/register", json={
+        "username": f"voter_{suffix}", "email": email, "password": "loadtest123"
+    }, timeout=30).raise_for_status()
+    response = requests.post(f"{base_url}/auth/login", data={
+        "username": email, "password": "loadtest123"
+    }, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("DB_NAME", "acode_lab"))
+    parser.add_argument("--voters", type=int, default=30)
+    parser.add_argument("--clicks", type=int, default=20, help="votes sent per voter")
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"Registering {args.voters} voters...")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tokens = list(pool.map(lambda _: register_and_login(args.base_url), range(args.voters)))
+
+    author = tokens[0]
+    response = requests.post(f"{args.base_url}/questions", json={
+        "title": f"Load test de votos {uuid.uuid4().hex[:6]}",
+        "content": "Pergunta criada pelo load test de votação concorrente.",
+        "tags": ["loadtest"]
+    }, headers={"Authorization": f"Bearer {author}"}, timeout=30)
+    response.raise_for_status()
+    question_id = response.json()["question_id"]
+
+    def vote(token):
+        vote_type = random.choice(["up", "down"])
+        started = time.perf_counter()
+        r = requests.post(f"{args.base_url}/questions/{question_id}/vote",
+                          json={"vote_type": vote_type},
+                          headers={"Authorization": f"Bearer {token}"}, timeout=30)
+        return time.perf_counter() - started, r.status_code
+
+    # Each voter votes `clicks` times; replaying a quarter of the burst adds double-clicks
+    jobs = [token for token in tokens for _ in range(args.clicks)]
+    random.shuffle(jobs)
+    print(f"Sending {len(jobs)} votes with concurrency {args.concurrency}...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(vote, jobs + jobs[: len(jobs) // 4]))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = [code for _, code in results if code != 200]
+    print(f"{len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.0f} req/s), {len(errors)} errors")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1000:.1f} ms | "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms | p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+    db = MongoClient(args.mongo_url)[args.db_name]
+    votes = list(db.votes.find({"target_id": question_id, "target_type": "question"}))
+    question = db.questions.find_one({"id": question_id})
+    up = sum(1 for v in votes if v["vote_type"] == "up")
+    down = sum(1 for v in votes if v["vote_type"] == "down")
+    distinct_voters = len({v["user_id"] for v in votes})
+
+    checks = {
+        "one vote per user": distinct_voters == len(votes) == args.voters,
+        "upvotes match votes": question["upvotes"] == up,
+        "downvotes match votes": question["downvotes"] == down,
+    }
+    for name, ok in checks.items():
+        print(f"{'OK  ' if ok else 'FAIL'} {name}")
+    print(f"votes stored: {len(votes)} ({up} up / {down} down), counters: "
+          f"{question['upvotes']} up / {question['downvotes']} down")
+    raise SystemExit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
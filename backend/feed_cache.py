@@ -0,0 +1,220 @@
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pagination import decode_cursor
+
+FeedKey = Tuple[object, str]  # (created_at, post_id), newest first
+RING_ENTRY_BYTES = 160  # tuple + datetime + uuid str, aproximado
+
+
+def approx_size(value) -> int:
+    """Rough deep size of a decoded Mongo document, for the memory budget."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approx_size(v) for v in value)
+    return size
+
+
+class _Timeline:
+    __slots__ = ("keys", "complete", "authors", "last_access", "expires_at")
+
+    def __init__(self, keys: Iterable[FeedKey], maxlen: int, complete: bool, authors: Set[str], ttl: float):
+        self.keys = deque(keys, maxlen=maxlen)
+        self.complete = complete
+        self.authors = authors
+        self.last_access = time.monotonic()
+        self.expires_at = self.last_access + ttl
+
+
+class FeedCache:
+    """In-process cache of home feeds: per-user ring buffers plus a shared post cache.
+
+    Each active user keeps the ``size_per_user`` newest feed keys in a
+    fixed-size deque. New posts are pushed onto the rings of cached readers,
+    so scrolling within the first ``size_per_user`` items never touches
+    Mongo; pages beyond the ring fall back to the timelines collection.
+    Pushes only see posts published by this process, so a ring is reloaded
+    from Mongo once it is ``ring_ttl`` seconds old; that bounds how long a
+    post fanned out by another worker process can be missing from it.
+    Post documents are shared across readers in an LRU with a short TTL
+    (``post_ttl``), which bounds how stale like/comment counters changed by
+    another worker process can be; changes made here are applied in place.
+
+    Memory is bounded by ``memory_budget`` bytes (approximate): users idle
+    for ``idle_seconds`` are evicted first, then least recently used users
+    and posts.
+    """
+
+    def __init__(self, size_per_user: int = 200, max_posts: int = 20000, post_ttl: float = 30.0,
+                 idle_seconds: float = 900.0, memory_budget: int = 64 * 1024 * 1024, ring_ttl: float = 30.0):
+        self.size_per_user = size_per_user
+        self.ring_ttl = ring_ttl
+        self.max_posts = max_posts
+        self.post_ttl = post_ttl
+        self.idle_seconds = idle_seconds
+        self.memory_budget = memory_budget
+        self._users: "OrderedDict[str, _Timeline]" = OrderedDict()
+        self._posts: "OrderedDict[str, Tuple[float, int, dict]]" = OrderedDict()
+        self._post_bytes = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.post_hits = 0
+        self.post_misses = 0
+        self.evicted_users = 0
+        self.expired_rings = 0
+
+    # Timelines
+
+    def page(self, owner_id: str, limit: int, cursor: Optional[str]) -> Optional[List[FeedKey]]:
+        """Keys of one feed page from the ring, or None when Mongo must answer it."""
+        timeline = self._users.get(owner_id)
+        now = time.monotonic()
+        if timeline is not None and timeline.expires_at <= now:
+            del self._users[owner_id]
+            self.expired_rings += 1
+            timeline = None
+        if timeline is None:
+            self.page_misses += 1
+            return None
+        timeline.last_access = now
+        self._users.move_to_end(owner_id)
+
+        keys = list(timeline.keys)
+        start = 0
+        if cursor:
+            after = tuple(decode_cursor(cursor, [("created_at", -1), ("id", -1)]))
+            while start < len(keys) and keys[start] >= after:
+                start += 1
+        page = keys[start:start + limit]
+        if len(page) < limit and not timeline.complete:
+            self.page_misses += 1
+            return None
+        self.page_hits += 1
+        return page
+
+    def load(self, owner_id: str, keys: List[FeedKey], complete: bool, authors: Set[str] = frozenset()) -> None:
+        """Cache the newest keys of ``owner_id``'s feed; ``complete`` if that is the whole feed.
+
+        ``authors`` are the fan-out-on-read authors merged into this feed, so
+        their new posts can be pushed here too.
+        """
+        if self.size_per_user <= 0:
+            return
+        self._users[owner_id] = _Timeline(
+            keys[:self.size_per_user], self.size_per_user, complete, set(authors), self.ring_ttl
+        )
+        self._users.move_to_end(owner_id)
+        self._enforce_budget()
+
+    def push(self, owner_ids: Iterable[str], key: FeedKey) -> None:
+        """A new post reached these timelines; update the cached ones."""
+        for owner_id in owner_ids:
+            timeline = self._users.get(owner_id)
+            if timeline is not None:
+                self._push(timeline, key)
+
+    def push_from_author(self, author_id: str, key: FeedKey) -> None:
+        """A fan-out-on-read author posted; update the cached readers following them."""
+        for timeline in self._users.values():
+            if author_id in timeline.authors:
+                self._push(timeline, key)
+
+    def _push(self, timeline: _Timeline, key: FeedKey) -> None:
+        if key in timeline.keys:
+            return
+        if not timeline.keys or key > timeline.keys[0]:
+            # Ao transbordar o deque descarta a mais antiga: o feed no cache deixa de ser completo
+            if len(timeline.keys) == timeline.keys.maxlen:
+                timeline.complete = False
+            timeline.keys.appendleft(key)
+        else:
+            # Rare (clock skew between workers): drop the ring rather than misorder it
+            timeline.keys.clear()
+            timeline.complete = False
+
+    def invalidate_user(self, *owner_ids: str) -> None:
+        for owner_id in owner_ids:
+            self._users.pop(owner_id, None)
+
+    # Posts
+
+    def get_posts(self, post_ids: Iterable[str]) -> Tuple[Dict[str, dict], List[str]]:
+        """(cached posts by id, ids that must be fetched)."""
+        now = time.monotonic()
+        found, missing = {}, []
+        for post_id in post_ids:
+            entry = self._posts.get(post_id)
+            if entry is not None and entry[0] > now:
+                self._posts.move_to_end(post_id)
+                found[post_id] = dict(entry[2])
+                self.post_hits += 1
+            else:
+                missing.append(post_id)
+                self.post_misses += 1
+        return found, missing
+
+    def set_posts(self, posts: Iterable[dict]) -> None:
+        if self.max_posts <= 0:
+            return
+        expires_at = time.monotonic() + self.post_ttl
+        for post in posts:
+            self._drop_post(post["id"])
+            size = approx_size(post)
+            self._posts[post["id"]] = (expires_at, size, dict(post))
+            self._post_bytes += size
+        while len(self._posts) > self.max_posts:
+            self._drop_post(next(iter(self._posts)))
+        self._enforce_budget()
+
+    def adjust_post(self, post_id: str, field: str, delta: int) -> None:
+        entry = self._posts.get(post_id)
+        if entry is not None:
+            entry[2][field] = entry[2].get(field, 0) + delta
+
+    def _drop_post(self, post_id: str) -> None:
+        entry = self._posts.pop(post_id, None)
+        if entry is not None:
+            self._post_bytes -= entry[1]
+
+    # Memory
+
+    def memory_bytes(self) -> int:
+        ring_bytes = sum(len(t.keys) for t in self._users.values()) * RING_ENTRY_BYTES
+        return ring_bytes + self._post_bytes
+
+    def _enforce_budget(self) -> None:
+        if self.memory_bytes() <= self.memory_budget:
+            return
+        idle_before = time.monotonic() - self.idle_seconds
+        for owner_id in [o for o, t in self._users.items() if t.last_access < idle_before]:
+            del self._users[owner_id]
+            self.evicted_users += 1
+        while self.memory_bytes() > self.memory_budget and (self._users or self._posts):
+            # Metade do orçamento para cada lado: corta o que estiver acima da sua parte
+            if self._posts and (self._post_bytes > self.memory_budget // 2 or not self._users):
+                self._drop_post(next(iter(self._posts)))
+            else:
+                self._users.popitem(last=False)
+                self.evicted_users += 1
+
+    def stats(self) -> dict:
+        pages = self.page_hits + self.page_misses
+        posts = self.post_hits + self.post_misses
+        return {
+            "users": len(self._users),
+            "posts": len(self._posts),
+            "memory_bytes": self.memory_bytes(),
+            "memory_budget": self.memory_budget,
+            "page_hits": self.page_hits,
+            "page_misses": self.page_misses,
+            "page_hit_rate": round(self.page_hits / pages, 4) if pages else 0.0,
+            "post_hits": self.post_hits,
+            "post_misses": self.post_misses,
+            "post_hit_rate": round(self.post_hits / posts, 4) if posts else 0.0,
+            "evicted_users": self.evicted_users,
+            "expired_rings": self.expired_rings,
+        }
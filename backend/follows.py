@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from pagination import apply_cursor, next_cursor
+from profiles import UserProfiles
+
+FOLLOWERS_SORT = [("created_at", DESCENDING), ("follower_id", DESCENDING)]
+FOLLOWING_SORT = [("created_at", DESCENDING), ("followee_id", DESCENDING)]
+# custom_title fica em user_profiles; a projeção ainda o lê de usuários não migrados
+LIST_USER_PROJECTION = {"_id": 0, "id": 1, "username": 1, "rank": 1, "pc_points": 1, "custom_title": 1}
+CARD_PROFILE_FIELDS = ("custom_title",)
+
+
+async def user_cards(db, user_ids: Iterable[str], query: Optional[dict] = None) -> Dict[str, dict]:
+    """Small user cards (LIST_USER_PROJECTION plus CARD_PROFILE_FIELDS) by id."""
+    users = await db.users.find(
+        {"id": {"$in": list(user_ids)}, **(query or {})}, LIST_USER_PROJECTION
+    ).to_list(None)
+    await UserProfiles(db).attach(users, CARD_PROFILE_FIELDS)
+    return {user["id"]: user for user in users}
+
+
+class FollowGraph:
+    """Follow relationships as ``{follower_id, followee_id, created_at}`` edges.
+
+    The unique (follower_id, followee_id) index makes following idempotent
+    under double clicks; (followee_id, created_at, follower_id) and
+    (follower_id, created_at, followee_id) serve the paginated lists and the
+    timeline fan-out. ``followers_count`` / ``following_count`` on the user
+    documents are moved with every edge that is actually inserted or deleted
+    (and re-checked by the counter reconciliation).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.edges = db.follows
+
+    async def follow(self, follower_id: str, followee_id: str) -> bool:
+        """Create the edge; False if it already existed."""
+        try:
+            await self.edges.insert_one({
+                "follower_id": follower_id,
+                "followee_id": followee_id,
+                "created_at": datetime.utcnow(),
+            })
+        except DuplicateKeyError:
+            return False
+        await self.db.users.update_one({"id": follower_id}, {"$inc": {"following_count": 1}})
+        await self.db.users.update_one({"id": followee_id}, {"$inc": {"followers_count": 1}})
+        return True
+
+    async def unfollow(self, follower_id: str, followee_id: str) -> bool:
+        """Delete the edge; False if there was none."""
+        result = await self.edges.delete_one({"follower_id": follower_id, "followee_id": followee_id})
+        if not result.deleted_count:
+            return False
+        await self.db.users.update_one({"id": follower_id}, {"$inc": {"following_count": -1}})
+        await self.db.users.update_one({"id": followee_id}, {"$inc": {"followers_count": -1}})
+        return True
+
+    async def is_following(self, follower_id: str, followee_id: str) -> bool:
+        return await self.edges.count_documents({"follower_id": follower_id, "followee_id": followee_id}, limit=1) > 0
+
+    async def followed_among(self, follower_id: str, candidates: Iterable[str]) -> Set[str]:
+        """Which of ``candidates`` ``follower_id`` follows (one query on the unique index)."""
+        candidates = list(candidates)
+        if not candidates:
+            return set()
+        docs = await self.edges.find(
+            {"follower_id": follower_id, "followee_id": {"$in": candidates}},
+            {"_id": 0, "followee_id": 1}
+        ).to_list(None)
+        return {doc["followee_id"] for doc in docs}
+
+    async def follower_batches(self, followee_id: str, batch_size: int = 1000) -> AsyncIterator[List[str]]:
+        batch = []
+        cursor = self.edges.find({"followee_id": followee_id}, {"_id": 0, "follower_id": 1}).batch_size(batch_size)
+        async for edge in cursor:
+            batch.append(edge["follower_id"])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _page(self, match: dict, sort, other: str, limit: int, cursor: Optional[str]) -> dict:
+        edges = await self.edges.find(
+            apply_cursor(match, sort, cursor), {"_id": 0}
+        ).sort(sort).limit(limit).to_list(limit)
+        by_id = await user_cards(self.db, (edge[other] for edge in edges))
+        return {
+            "items": [
+                {**by_id[edge[other]], "followed_at": edge["created_at"]}
+                for edge in edges if edge[other] in by_id
+            ],
+            "next_cursor": next_cursor(edges, sort, limit),
+        }
+
+    async def followers(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+        """Page of users following ``user_id``, newest first. Raises ValueError for a bad cursor."""
+        return await self._page({"followee_id": user_id}, FOLLOWERS_SORT, "follower_id", limit, cursor)
+
+    async def following(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+        """Page of users ``user_id`` follows, newest first. Raises ValueError for a bad cursor."""
+        return await self._page({"follower_id": user_id}, FOLLOWING_SORT, "followee_id", limit, cursor)
+
+    async def create_indexes(self) -> None:
+        await self.edges.create_index([("follower_id", 1), ("followee_id", 1)], unique=True)
+        await self.edges.create_index([("followee_id", 1)] + FOLLOWERS_SORT)
+        await self.edges.create_index([("follower_id", 1)] + FOLLOWING_SORT)
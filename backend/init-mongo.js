@@ -139,6 +139,9 @@ db.createCollection('articles', {
 // Create indexes for better performance
 db.users.createIndex({ "email": 1 }, { unique: true });
 db.users.createIndex({ "username": 1 }, { unique: true });
+db.users.createIndex({ "id": 1 }, { unique: true });
+db.companies.createIndex({ "id": 1 }, { unique: true });
+db.companies.createIndex({ "email": 1 });
 db.posts.createIndex({ "author_id": 1, "created_at": -1 });
 db.posts.createIndex({ "created_at": -1 });
 db.store_items.createIndex({ "item_type": 1 });
@@ -147,6 +150,43 @@ db.jobs.createIndex({ "created_at": -1 });
 db.articles.createIndex({ "author_id": 1, "created_at": -1 });
 db.articles.createIndex({ "category": 1, "created_at": -1 });
 db.articles.createIndex({ "created_at": -1 });
+db.questions.createIndex(
+    { "title": "text", "tags": "text", "content": "text", "author_username": "text" },
+    {
+        name: "questions_text",
+        weights: { "title": 10, "tags": 5, "content": 2, "author_username": 1 },
+        default_language: "portuguese"
+    }
+);
+db.questions.createIndex({ "created_at": -1, "id": -1 });
+db.votes.createIndex({ "user_id": 1, "target_id": 1, "target_type": 1 }, { unique: true, name: "one_vote_per_user" });
+db.answers.createIndex({ "question_id": 1, "is_accepted": -1, "score": -1, "created_at": -1, "id": -1 });
+db.tag_stats.createIndex({ "count": -1, "_id": 1 });
+db.questions.createIndex({ "hot_score": -1, "id": -1 });
+db.questions.createIndex({ "search_terms": 1 });
+db.votes.createIndex({ "target_id": 1, "target_type": 1 });
+db.likes.createIndex({ "target_id": 1, "target_type": 1 });
+db.likes.createIndex({ "user_id": 1, "target_id": 1, "target_type": 1 });
+db.comments.createIndex({ "post_id": 1, "created_at": 1, "id": 1 });
+db.reconciliation_reports.createIndex({ "started_at": -1 });
+db.posts.createIndex({ "id": 1 });
+db.posts.createIndex({ "created_at": -1, "id": -1 });
+db.posts.createIndex({ "author_id": 1, "created_at": -1, "id": -1 });
+db.timelines.createIndex({ "owner_id": 1, "created_at": -1, "post_id": -1 }, { unique: true });
+db.timelines.createIndex({ "owner_id": 1, "author_id": 1 });
+db.posts_likes_shards.createIndex({ "target_id": 1 });
+db.follows.createIndex({ "follower_id": 1, "followee_id": 1 }, { unique: true });
+db.follows.createIndex({ "followee_id": 1, "created_at": -1, "follower_id": -1 });
+db.follows.createIndex({ "follower_id": 1, "created_at": -1, "followee_id": -1 });
+db.user_profiles.createIndex({ "user_id": 1 }, { unique: true });
+db.user_suggestions.createIndex({ "user_id": 1 }, { unique: true });
+db.job_leases.createIndex({ "expires_at": 1 }, { expireAfterSeconds: 0 });
+db.user_profiles.createIndex({ "skills": 1 });
+db.questions.createIndex({ "author_id": 1, "tags": 1 });
+db.users.createIndex({ "followers_count": -1 });
+db.portfolio_submissions.createIndex({ "id": 1 });
+db.portfolio_submissions.createIndex({ "week_year": 1, "user_id": 1 });
+db.revoked_tokens.createIndex({ "expires_at": 1 }, { expireAfterSeconds: 0 });
 
 // Create admin user if it doesn't exist
 const adminUser = db.users.findOne({ "email": "admin@acodelab.com" });
@@ -3,10 +3,9 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from bson import ObjectId
-import json
-from bson import json_util
 
-from server import get_current_user, db
+from responses import BSONJSONResponse
+from server import get_current_user, db, tag_stats
 
 jobs_router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
@@ -152,8 +151,7 @@ async def get_jobs(
         
         jobs = await db.jobs.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(jobs))
+        return BSONJSONResponse(jobs)
         
     except HTTPException:
         raise
@@ -200,8 +198,7 @@ async def get_job(job_id: str):
         
         job = jobs[0]
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(job))
+        return BSONJSONResponse(job)
         
     except HTTPException:
         raise
@@ -231,13 +228,13 @@ async def create_job(
         job_dict["is_active"] = True
         
         result = await db.jobs.insert_one(job_dict)
+        await tag_stats.record("jobs", job_dict.get("skills", []))
         
         # Buscar a vaga criada
         created_job = await db.jobs.find_one({"_id": result.inserted_id})
         created_job["applications_count"] = 0
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_job))
+        return BSONJSONResponse(created_job)
         
     except HTTPException:
         raise
@@ -296,8 +293,7 @@ async def update_job(
         applications_count = await db.job_applications.count_documents({"job_id": ObjectId(job_id)})
         updated_job["applications_count"] = applications_count
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(updated_job))
+        return BSONJSONResponse(updated_job)
         
     except HTTPException:
         raise
@@ -426,8 +422,7 @@ async def apply_to_job(
             "profile_image": current_user.get("profile_image")
         }
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_application))
+        return BSONJSONResponse(created_application)
         
     except HTTPException:
         raise
@@ -499,8 +494,7 @@ async def get_job_applications(
         for app in applications:
             app["job"] = job
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(applications))
+        return BSONJSONResponse(applications)
         
     except HTTPException:
         raise
@@ -568,8 +562,7 @@ async def update_application_status(
             "profile_image": user.get("profile_image")
         }
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(updated_application))
+        return BSONJSONResponse(updated_application)
         
     except HTTPException:
         raise
@@ -615,8 +608,7 @@ async def get_user_applications(
                 "profile_image": current_user.get("profile_image")
             }
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(applications))
+        return BSONJSONResponse(applications)
         
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,118 @@
+import asyncio
+import bisect
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from responses import dumps_bson
+
+
+def current_week() -> str:
+    """Week key of portfolio submissions ("2025-W01")."""
+    return datetime.now().strftime("%Y-W%U")
+
+
+class PortfolioLeaderboard:
+    """Current week's portfolio submissions ranked by votes, kept in memory.
+
+    Entries live in a list sorted by ``(-votes, created_at, id)`` and move with
+    every vote, so reading the top ``size`` never queries Mongo; the rendered
+    body and its ETag are cached until the ranking changes. The list is
+    seeded from ``portfolio_submissions`` at startup, again when the week
+    rolls over, and every ``refresh_interval`` seconds to pick up votes
+    received by other workers. ``votes`` is written synchronously on every
+    vote, so the stored value always wins on a refresh (including downward
+    repairs by the counter reconciliation).
+    """
+
+    def __init__(self, db, size: int = 10, refresh_interval: float = 30):
+        self.db = db
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.week: Optional[str] = None
+        self._entries: Dict[str, dict] = {}
+        self._ranking: List[Tuple[int, datetime, str]] = []
+        self._rendered: Optional[Tuple[bytes, str]] = None
+        self._seed_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.renders = 0
+
+    @staticmethod
+    def _key(entry: dict) -> Tuple[int, datetime, str]:
+        return (-entry.get("votes", 0), entry["created_at"], entry["id"])
+
+    def _insert(self, entry: dict) -> None:
+        self._entries[entry["id"]] = entry
+        bisect.insort(self._ranking, self._key(entry))
+
+    def _remove(self, entry: dict) -> None:
+        index = bisect.bisect_left(self._ranking, self._key(entry))
+        del self._ranking[index]
+
+    async def seed(self) -> None:
+        async with self._seed_lock:
+            week = current_week()
+            docs = await self.db.portfolio_submissions.find({"week_year": week}, {"_id": 0}).to_list(None)
+            self.week = week
+            self._entries = {}
+            self._ranking = []
+            for doc in docs:
+                self._insert(doc)
+            self._rendered = None
+
+    def get(self, portfolio_id: str) -> Optional[dict]:
+        return self._entries.get(portfolio_id)
+
+    def add(self, submission: dict) -> None:
+        if submission.get("week_year") == self.week and submission["id"] not in self._entries:
+            self._insert({k: v for k, v in submission.items() if k != "_id"})
+            self._rendered = None
+
+    def vote(self, portfolio_id: str, amount: int = 1) -> None:
+        entry = self._entries.get(portfolio_id)
+        if entry is None:
+            return
+        self._remove(entry)
+        entry["votes"] = entry.get("votes", 0) + amount
+        bisect.insort(self._ranking, self._key(entry))
+        self._rendered = None
+
+    async def top(self) -> Tuple[bytes, str]:
+        """JSON body of the top ``size`` entries and its ETag."""
+        if self.week != current_week():
+            await self.seed()
+        if self._rendered is None:
+            body = dumps_bson([self._entries[key[2]] for key in self._ranking[:self.size]])
+            self._rendered = (body, '"%s"' % hashlib.md5(body).hexdigest())
+            self.renders += 1
+        return self._rendered
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.seed()
+            except Exception as e:
+                print(f"Erro ao recarregar o ranking de portfólios: {str(e)}")
+
+    async def start(self) -> None:
+        await self.seed()
+        if self.refresh_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "week": self.week,
+            "submissions": len(self._entries),
+            "refresh_interval_seconds": self.refresh_interval,
+            "renders": self.renders,
+        }
@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+class JobLease:
+    """Cross-process lease on a periodic job, kept as one document in ``job_leases``.
+
+    Every API worker runs the same background loops; the worker whose
+    ``acquire`` succeeds runs the job and the others skip it until the lease
+    expires. ``duration`` is normally the job interval, so the lease also
+    spaces runs out across workers; a worker that dies mid-run only delays
+    the next run until then.
+    """
+
+    def __init__(self, collection, name: str):
+        self.collection = collection
+        self.name = name
+        self.owner = uuid.uuid4().hex
+
+    async def acquire(self, duration: float) -> bool:
+        now = datetime.utcnow()
+        try:
+            # Documento expirado (ou nosso) é retomado; um lease vivo de outro
+            # worker não casa o filtro e o upsert esbarra no _id
+            await self.collection.update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lte": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": now + timedelta(seconds=duration)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release(self) -> None:
+        await self.collection.delete_one({"_id": self.name, "owner": self.owner})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Migração: arrays users.following/followers -> coleção de arestas ``follows``.
+
+For every user still carrying the legacy arrays, both directions are
+upserted as edges in unordered bulk writes (the arrays may disagree with
+each other; their union wins). Then followers_count / following_count are
+recomputed from the edges by the user_followers / user_following
+reconciliation checks and the arrays are removed. The counters are never
+zeroed and each repair is conditional on the value read, so it is safe to
+run more than once, also against a live server; the server runs it once at
+startup through run_migrations.
+
+Uso:
+    cd backend
+    python migrate_follows.py [--batch-size 1000] [--keep-arrays]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from follows import FollowGraph
+from reconcile import COUNTER_CHECKS, Reconciler
+
+FOLLOW_CHECKS = ("user_followers", "user_following")
+
+
+def _edge(follower_id: str, followee_id: str, now: datetime) -> UpdateOne:
+    key = {"follower_id": follower_id, "followee_id": followee_id}
+    return UpdateOne(key, {"$setOnInsert": {**key, "created_at": now}}, upsert=True)
+
+
+async def recount_follows(db, batch_size: int = 1000) -> dict:
+    """Bring followers_count / following_count on every user in line with the edges.
+
+    Counters are never zeroed first: each user is recomputed in batches and
+    only drifted values are rewritten, conditionally on the value read.
+    """
+    checks = [check for check in COUNTER_CHECKS if check.name in FOLLOW_CHECKS]
+    return await Reconciler(db, checks, batch_size=batch_size, pause=0).run()
+
+
+async def migrate_follow_arrays(db, batch_size: int = 1000, keep_arrays: bool = False) -> dict:
+    await FollowGraph(db).create_indexes()
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    users = edges = 0
+    ops = []
+
+    legacy = {"$or": [{"following.0": {"$exists": True}}, {"followers.0": {"$exists": True}}]}
+    async for user in db.users.find(legacy, {"_id": 0, "id": 1, "following": 1, "followers": 1}):
+        users += 1
+        ops.extend(_edge(user["id"], followee) for followee in set(user.get("following") or []) if followee != user["id"])
+        ops.extend(_edge(follower, user["id"]) for follower in set(user.get("followers") or []) if follower != user["id"])
+        while len(ops) >= batch_size:
+            result = await db.follows.bulk_write(ops[:batch_size], ordered=False)
+            edges += result.upserted_count
+            ops = ops[batch_size:]
+    if ops:
+        result = await db.follows.bulk_write(ops, ordered=False)
+        edges += result.upserted_count
+
+    await recount_follows(db, batch_size)
+    if not keep_arrays:
+        await db.users.update_many(
+            {"$or": [{"following": {"$exists": True}}, {"followers": {"$exists": True}}]},
+            {"$unset": {"following": "", "followers": ""}}
+        )
+    return {"users": users, "edges_created": edges, "seconds": round(time.perf_counter() - started, 2)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.getenv("DB_NAME", "acode_lab"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--keep-arrays", action="store_true", help="don't $unset the legacy arrays")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    report = await migrate_follow_arrays(client[args.db_name], args.batch_size, args.keep_arrays)
+    print(f"{report['users']} usuários migrados, {report['edges_created']} arestas criadas em {report['seconds']}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
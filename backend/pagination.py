@@ -0,0 +1,73 @@
+import base64
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bson import json_util
+
+SortSpec = Sequence[Tuple[str, int]]
+
+
+def encode_cursor(doc: dict, sort: SortSpec) -> str:
+    """Opaque continuation token holding the sort-key values of ``doc``."""
+    values = [doc.get(field) for field, _ in sort]
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> List:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def keyset_filter(sort: SortSpec, values: Sequence) -> dict:
+    """Filter matching documents strictly after ``values`` in ``sort`` order.
+
+    For sort keys (a, b, c) this is the usual expansion
+    a > x OR (a == x AND b > y) OR (a == x AND b == y AND c > z),
+    with > / < picked per key from its direction.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def apply_cursor(query: dict, sort: SortSpec, cursor: Optional[str]) -> dict:
+    """AND the keyset condition for ``cursor`` into ``query`` (no-op for the first page)."""
+    if not cursor:
+        return query
+    after = keyset_filter(sort, decode_cursor(cursor, sort))
+    return {"$and": [query, after]} if query else after
+
+
+def next_cursor(page: list, sort: SortSpec, limit: int) -> Optional[str]:
+    """Cursor for the page after ``page``, or None when this was the last one."""
+    if len(page) < limit or not page:
+        return None
+    return encode_cursor(page[-1], sort)
+
+
+def field_projection(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ("id",)) -> Optional[dict]:
+    """Inclusion projection for a comma-separated ``fields`` parameter.
+
+    ``always`` fields (the id and the sort keys a cursor needs) are added
+    automatically; unknown names raise ValueError. None/empty means full
+    documents.
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = set(requested) - set(allowed)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    projection = {"_id": 0}
+    projection.update({name: 1 for name in [*always, *requested]})
+    return projection
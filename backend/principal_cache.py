@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class PrincipalCache:
+    """In-process LRU + TTL cache of authenticated principals keyed by token subject.
+
+    Entries are write-through invalidated by the handlers that change a
+    principal (profile, points, follows, moderation). The TTL bounds how long
+    a change made by another worker process can stay invisible here.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[dict]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[subject]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        # Handlers sometimes annotate current_user, never hand out the cached dict
+        return dict(principal)
+
+    def set(self, subject: str, principal: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl, dict(principal))
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *subjects: str) -> None:
+        for subject in subjects:
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
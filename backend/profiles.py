@@ -0,0 +1,115 @@
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+# Campos "frios" do usuário: só lidos na página de perfil, nunca no caminho de autenticação
+PROFILE_DEFAULTS = {
+    "bio": "",
+    "location": "",
+    "website": "",
+    "github": "",
+    "linkedin": "",
+    "skills": [],
+    "experience": "",
+    "achievements": [],
+    "portfolio_projects": [],
+    "theme_color": "#D97745",
+    "banner_image": "",
+    "custom_title": "",
+    "social_links": {},
+    "showcase_projects": [],
+    "featured_skills": [],
+}
+PROFILE_FIELDS = list(PROFILE_DEFAULTS)
+
+
+def split_profile(user_doc: dict) -> Dict[str, object]:
+    """Remove and return the profile fields of a full user document."""
+    return {field: user_doc.pop(field) for field in PROFILE_FIELDS if field in user_doc}
+
+
+class UserProfiles:
+    """Cold half of the user document, kept in ``user_profiles``.
+
+    One document per user (``user_id`` unique) with the bulky profile fields,
+    so the ``users`` document read on every authenticated request stays
+    small. Users not migrated yet still have the fields inline; ``get`` falls
+    back to them.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.user_profiles
+
+    async def get(self, user_id: str, legacy: Optional[dict] = None) -> dict:
+        """Profile of ``user_id`` with defaults filled in.
+
+        ``legacy`` is the user document, if the caller already has it; its
+        inline profile fields are used when there is no profile document.
+        """
+        profile = await self.collection.find_one({"user_id": user_id}, {"_id": 0, "user_id": 0})
+        if profile is None:
+            if legacy is None:
+                legacy = await self.db.users.find_one({"id": user_id}, {"_id": 0, **{f: 1 for f in PROFILE_FIELDS}}) or {}
+            profile = {field: legacy[field] for field in PROFILE_FIELDS if field in legacy}
+        return {**PROFILE_DEFAULTS, **profile}
+
+    async def attach(self, users: List[dict], fields: Iterable[str]) -> List[dict]:
+        """Set ``fields`` from the profiles on each of ``users`` (one query for all).
+
+        Users not migrated yet keep the inline value already on their document.
+        """
+        fields = list(fields)
+        profiles = await self.collection.find(
+            {"user_id": {"$in": [user["id"] for user in users]}},
+            {"_id": 0, "user_id": 1, **{f: 1 for f in fields}}
+        ).to_list(None)
+        by_user = {profile["user_id"]: profile for profile in profiles}
+        for user in users:
+            profile = by_user.get(user["id"], user)
+            for field in fields:
+                user[field] = profile.get(field, PROFILE_DEFAULTS[field])
+        return users
+
+    async def create(self, user_id: str, profile: dict) -> None:
+        await self.collection.insert_one({"user_id": user_id, **PROFILE_DEFAULTS, **profile})
+
+    async def update(self, user_id: str, changes: dict) -> None:
+        if not await self.collection.count_documents({"user_id": user_id}, limit=1):
+            # Primeira escrita de um usuário não migrado: copia o perfil inline antes
+            await self.migrate_one(user_id)
+        await self.collection.update_one({"user_id": user_id}, {"$set": changes}, upsert=True)
+
+    async def migrate_one(self, user_id: str) -> None:
+        legacy = await self.db.users.find_one({"id": user_id}, {"_id": 0, **{f: 1 for f in PROFILE_FIELDS}}) or {}
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$setOnInsert": {**PROFILE_DEFAULTS, **legacy}},
+            upsert=True
+        )
+        await self.db.users.update_one({"id": user_id}, {"$unset": {f: "" for f in PROFILE_FIELDS}})
+
+    async def migrate(self, batch_size: int = 500) -> int:
+        """Move inline profile fields of every user into user_profiles; returns users moved."""
+        moved, ops, ids = 0, [], []
+        legacy = {"$or": [{field: {"$exists": True}} for field in PROFILE_FIELDS]}
+        projection = {"_id": 0, "id": 1, **{f: 1 for f in PROFILE_FIELDS}}
+        async for user in self.db.users.find(legacy, projection):
+            user_id = user.pop("id")
+            ops.append(UpdateOne({"user_id": user_id}, {"$setOnInsert": {**PROFILE_DEFAULTS, **user}}, upsert=True))
+            ids.append(user_id)
+            if len(ops) >= batch_size:
+                moved += await self._flush_migration(ops, ids)
+                ops, ids = [], []
+        if ops:
+            moved += await self._flush_migration(ops, ids)
+        return moved
+
+    async def _flush_migration(self, ops, ids) -> int:
+        await self.collection.bulk_write(ops, ordered=False)
+        # Só remove dos users depois que o perfil foi gravado
+        await self.db.users.update_many({"id": {"$in": ids}}, {"$unset": {f: "" for f in PROFILE_FIELDS}})
+        return len(ids)
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index("user_id", unique=True)
@@ -0,0 +1,56 @@
+import math
+from datetime import datetime
+from typing import Dict, List
+
+# Reddit-style "hot" ranking. A question's hot score is
+#
+#     sign(points) * log10(max(|points|, 1)) + age_seconds / HOT_DECAY_SECONDS
+#
+# where age is measured from a fixed epoch. Newer questions get a bigger time
+# term, so older ones decay relative to them without any periodic rescoring:
+# the score only changes when its inputs (votes, answers, views) change and
+# can be recomputed incrementally inside the same update that changes them.
+HOT_EPOCH = datetime(2025, 1, 1)
+HOT_DECAY_SECONDS = 45000  # 10x mais pontos valem ~12,5 horas de novidade
+ANSWER_POINTS = 2
+VIEWS_PER_POINT = 50
+
+
+def hot_score(score: int, answers_count: int, views: int, created_at: datetime) -> float:
+    points = score + answers_count * ANSWER_POINTS + views / VIEWS_PER_POINT
+    order = math.log10(max(abs(points), 1))
+    sign = 1 if points > 0 else -1 if points < 0 else 0
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return sign * order + age / HOT_DECAY_SECONDS
+
+
+# Same formula as an aggregation expression, for pipeline updates
+HOT_SCORE_EXPR = {
+    "$let": {
+        "vars": {
+            "points": {"$add": [
+                {"$ifNull": ["$score", 0]},
+                {"$multiply": [{"$ifNull": ["$answers_count", 0]}, ANSWER_POINTS]},
+                {"$divide": [{"$ifNull": ["$views", 0]}, VIEWS_PER_POINT]}
+            ]}
+        },
+        "in": {"$add": [
+            {"$multiply": [
+                {"$cond": [{"$gt": ["$$points", 0]}, 1, {"$cond": [{"$lt": ["$$points", 0]}, -1, 0]}]},
+                {"$log10": {"$max": [{"$abs": "$$points"}, 1]}}
+            ]},
+            {"$divide": [
+                {"$divide": [{"$subtract": ["$created_at", HOT_EPOCH]}, 1000]},
+                HOT_DECAY_SECONDS
+            ]}
+        ]}
+    }
+}
+
+REFRESH_HOT_SCORE = [{"$set": {"hot_score": HOT_SCORE_EXPR}}]
+
+
+def inc_with_hot_score(inc: Dict[str, int]) -> List[dict]:
+    """Pipeline update equivalent to ``{"$inc": inc}`` that also refreshes hot_score."""
+    added = {field: {"$add": [{"$ifNull": [f"${field}", 0]}, amount]} for field, amount in inc.items()}
+    return [{"$set": added}] + REFRESH_HOT_SCORE
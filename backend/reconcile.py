@@ -0,0 +1,240 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ranking import REFRESH_HOT_SCORE
+
+MAX_SAMPLES = 20
+
+
+def count_where(field: str, value) -> dict:
+    return {"$sum": {"$cond": [{"$eq": [f"${field}", value]}, 1, 0]}}
+
+
+COUNT = {"$sum": 1}
+
+
+class CounterCheck:
+    """One family of denormalized counters and the source documents behind them.
+
+    ``fields`` maps each counter on the ``target`` collection to the ``$group``
+    accumulator that recomputes it from ``source`` documents whose ``key``
+    points at the target's ``id``. ``derived`` computes further fields from the
+    recomputed values, and ``refresh`` is a list of pipeline stages appended to
+    every repair (e.g. the hot_score refresh on questions). Target documents
+    not matching ``target_filter`` are skipped.
+
+    ``shards`` maps a counter to the collection of its ShardedCounter shards
+    (``{target_id, count}`` documents): the field on the target only holds
+    the base, so the expected value is the recomputed count minus the sum of
+    the shards.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target: str,
+        source: str,
+        key: str,
+        fields: Dict[str, dict],
+        match: Optional[dict] = None,
+        derived: Optional[Callable[[dict], dict]] = None,
+        refresh: Optional[list] = None,
+        target_filter: Optional[dict] = None,
+        shards: Optional[Dict[str, str]] = None,
+    ):
+        self.name = name
+        self.target = target
+        self.source = source
+        self.key = key
+        self.fields = fields
+        self.match = match or {}
+        self.derived = derived
+        self.refresh = refresh or []
+        self.target_filter = target_filter or {}
+        self.shards = shards or {}
+
+    def expected(self, counts: dict) -> dict:
+        values = {field: counts.get(field, 0) for field in self.fields}
+        if self.derived:
+            values.update(self.derived(values))
+        return values
+
+
+class Reconciler:
+    """Recomputes denormalized counters and repairs the ones that drifted.
+
+    Each check walks its target collection by ``_id`` in batches of
+    ``batch_size``, recomputes the counters of that batch with one
+    aggregation over the source collection and repairs mismatches with one
+    unordered ``bulk_write``. Repairs are conditional on the values read, so a
+    counter moved by live traffic in the meantime is left for the next run
+    instead of being overwritten. The job sleeps ``pause`` seconds between
+    batches to stay out of the way of production traffic, and runs every
+    ``interval`` seconds (0 = only on demand).
+    """
+
+    def __init__(self, db, checks: List[CounterCheck], batch_size: int = 500,
+                 pause: float = 0.1, interval: float = 0):
+        self.db = db
+        self.checks = checks
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self.last_report: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._manual: Optional[asyncio.Task] = None
+        self._run_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked() or (self._manual is not None and not self._manual.done())
+
+    async def _check_batch(self, check: CounterCheck, targets: List[dict], dry_run: bool, result: dict) -> None:
+        ids = [doc["id"] for doc in targets if "id" in doc]
+        pipeline = [
+            {"$match": {**check.match, check.key: {"$in": ids}}},
+            {"$group": {"_id": f"${check.key}", **check.fields}},
+        ]
+        counts = {row.pop("_id"): row async for row in self.db[check.source].aggregate(pipeline)}
+        for field, collection in check.shards.items():
+            async for row in self.db[collection].aggregate([
+                {"$match": {"target_id": {"$in": ids}}},
+                {"$group": {"_id": "$target_id", "count": {"$sum": "$count"}}},
+            ]):
+                recomputed = counts.setdefault(row["_id"], {})
+                recomputed[field] = recomputed.get(field, 0) - row["count"]
+
+        repairs = []
+        for doc in targets:
+            if "id" not in doc:
+                continue
+            expected = check.expected(counts.get(doc["id"], {}))
+            stored = {field: doc.get(field) for field in expected}
+            if stored == expected:
+                continue
+
+            result["drifted"] += 1
+            if len(result["samples"]) < MAX_SAMPLES:
+                result["samples"].append({
+                    "id": doc["id"],
+                    "stored": stored,
+                    "expected": expected,
+                })
+            repairs.append(UpdateOne(
+                {"_id": doc["_id"], **stored},
+                [{"$set": expected}] + check.refresh
+            ))
+
+        if repairs and not dry_run:
+            try:
+                outcome = (await self.db[check.target].bulk_write(repairs, ordered=False)).bulk_api_result
+            except BulkWriteError as e:
+                outcome = e.details
+                result["errors"] += len(outcome.get("writeErrors", []))
+            result["repaired"] += outcome.get("nModified", 0)
+            result["skipped"] += len(repairs) - outcome.get("nMatched", 0) - len(outcome.get("writeErrors", []))
+
+    async def _run_check(self, check: CounterCheck, dry_run: bool) -> dict:
+        started = time.perf_counter()
+        result = {"scanned": 0, "drifted": 0, "repaired": 0, "skipped": 0, "errors": 0, "samples": []}
+        projection = {"id": 1, **{field: 1 for field in check.expected({})}}
+        last_id = None
+
+        while True:
+            query = dict(check.target_filter)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            targets = await self.db[check.target].find(query, projection).sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not targets:
+                break
+            last_id = targets[-1]["_id"]
+            result["scanned"] += len(targets)
+            await self._check_batch(check, targets, dry_run, result)
+            await asyncio.sleep(self.pause)
+
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def run(self, dry_run: bool = False, only: Optional[List[str]] = None) -> dict:
+        async with self._run_lock:
+            report = {
+                "started_at": datetime.utcnow(),
+                "dry_run": dry_run,
+                "checks": {},
+            }
+            for check in self.checks:
+                if only and check.name not in only:
+                    continue
+                report["checks"][check.name] = await self._run_check(check, dry_run)
+            report["finished_at"] = datetime.utcnow()
+            report["drifted"] = sum(c["drifted"] for c in report["checks"].values())
+            report["repaired"] = sum(c["repaired"] for c in report["checks"].values())
+
+            self.last_report = report
+            await self.db.reconciliation_reports.insert_one(dict(report))
+            print(f"Reconciliação: {report['drifted']} contadores divergentes, {report['repaired']} corrigidos")
+            return report
+
+    async def _run_safely(self, **kwargs) -> None:
+        try:
+            await self.run(**kwargs)
+        except Exception as e:
+            print(f"Erro na reconciliação de contadores: {str(e)}")
+
+    def trigger(self, dry_run: bool = False, only: Optional[List[str]] = None) -> bool:
+        """Start a run in the background; False if one is already running."""
+        if self.running:
+            return False
+        self._manual = asyncio.create_task(self._run_safely(dry_run=dry_run, only=only))
+        return True
+
+    async def _periodic(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._run_safely()
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._periodic())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._manual is not None and not self._manual.done():
+            self._manual.cancel()
+
+
+def _score(values: dict) -> dict:
+    return {"score": values["upvotes"] - values["downvotes"]}
+
+
+VOTE_FIELDS = {"upvotes": count_where("vote_type", "up"), "downvotes": count_where("vote_type", "down")}
+
+COUNTER_CHECKS = [
+    CounterCheck("question_answers", "questions", "answers", "question_id",
+                 {"answers_count": COUNT}, refresh=REFRESH_HOT_SCORE),
+    CounterCheck("question_votes", "questions", "votes", "target_id", VOTE_FIELDS,
+                 match={"target_type": "question"}, derived=_score, refresh=REFRESH_HOT_SCORE),
+    CounterCheck("answer_votes", "answers", "votes", "target_id", VOTE_FIELDS,
+                 match={"target_type": "answer"}, derived=_score),
+    # Posts com likes em shards (sharded_counter.py) guardam só a base no documento
+    CounterCheck("post_likes", "posts", "likes", "target_id", {"likes": COUNT},
+                 match={"target_type": "post"}, shards={"likes": "posts_likes_shards"}),
+    CounterCheck("post_comments", "posts", "comments", "post_id", {"comments_count": COUNT}),
+    CounterCheck("comment_likes", "comments", "likes", "target_id", {"likes": COUNT},
+                 match={"target_type": "comment"}),
+    CounterCheck("portfolio_votes", "portfolio_submissions", "votes", "target_id", {"votes": COUNT},
+                 match={"target_type": "portfolio"}),
+    CounterCheck("user_followers", "users", "follows", "followee_id", {"followers_count": COUNT}),
+    CounterCheck("user_following", "users", "follows", "follower_id", {"following_count": COUNT}),
+]
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId, json_util
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional, cai para o json da stdlib
+    orjson = None
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bson_default(obj: Any) -> Any:
+    """Encode BSON types exactly like ``json.loads(json_util.dumps(obj))`` used to.
+
+    ObjectId and naive UTC datetimes (what Motor returns) take a fast path; any
+    other BSON type is handed to json_util so the wire format stays relaxed
+    Extended JSON ({"$oid": ...}, {"$date": ...}, {"$numberDecimal": ...}).
+    """
+    if isinstance(obj, ObjectId):
+        return {"$oid": str(obj)}
+    if isinstance(obj, datetime) and obj.tzinfo is None and obj >= _EPOCH:
+        millis = obj.microsecond // 1000
+        seconds = obj.strftime("%Y-%m-%dT%H:%M:%S")
+        return {"$date": f"{seconds}.{millis:03d}Z" if millis else f"{seconds}Z"}
+    return json_util.default(obj)
+
+
+def dumps_bson(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=bson_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(
+        content,
+        default=bson_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSON response that renders Mongo documents to bytes in a single pass.
+
+    Replaces ``json.loads(json_util.dumps(docs))``, which serialised every
+    document to a string, parsed it back and let FastAPI serialise it again.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bson(content)
@@ -0,0 +1,43 @@
+import re
+from typing import Iterable, List
+
+from pymongo import UpdateOne
+
+from tag_stats import normalize_tags
+
+WORD = re.compile(r"\w+")
+MAX_QUERY_WORDS = 5
+
+
+def search_terms(title: str, tags: Iterable = ()) -> List[str]:
+    """Lower-cased title words and tags, stored as ``search_terms`` on questions.
+
+    The multikey index on this field serves case-sensitive anchored regexes
+    (``^pyth``) as an index range, which the ``$text`` index cannot do.
+    """
+    terms = set(WORD.findall((title or "").lower()))
+    for tag in normalize_tags(tags):
+        terms.add(tag)
+        terms.update(WORD.findall(tag))
+    return sorted(terms)
+
+
+def prefix_query(search: str) -> dict:
+    """Questions with a term starting with each word of ``search`` (empty dict if no words)."""
+    words = WORD.findall(search.lower())[:MAX_QUERY_WORDS]
+    return {"$and": [{"search_terms": {"$regex": f"^{re.escape(word)}"}} for word in words]} if words else {}
+
+
+async def backfill_search_terms(collection, batch_size: int = 1000) -> int:
+    """Set ``search_terms`` on questions created before the field existed."""
+    ops, updated = [], 0
+    async for doc in collection.find({"search_terms": {"$exists": False}}, {"_id": 1, "title": 1, "tags": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": search_terms(doc.get("title"), doc.get("tags"))}}))
+        if len(ops) >= batch_size:
+            await collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    return updated
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, HTTPException, Depends, status, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, status, APIRouter, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import TEXT, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel, EmailStr, Field
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
@@ -11,8 +12,27 @@ import os
 import uuid
 from dotenv import load_dotenv
 from enum import Enum
-from bson import json_util
-import json
+
+from principal_cache import PrincipalCache
+from password_service import PasswordService, PasswordServiceBusy
+from token_revocation import TokenRevocationList
+from write_behind import ActivityTracker, ViewCounter
+from pagination import apply_cursor, field_projection, next_cursor
+from responses import BSONJSONResponse
+from tag_stats import TagStats
+from ranking import REFRESH_HOT_SCORE, hot_score, inc_with_hot_score
+from similarity import QuestionSimilarity
+from reconcile import COUNTER_CHECKS, Reconciler
+from timeline import TimelineFanout
+from feed_cache import FeedCache
+from annotations import annotate_likes, annotate_votes
+from sharded_counter import ShardedCounter
+from follows import FollowGraph
+from migrate_follows import migrate_follow_arrays
+from profiles import UserProfiles, split_profile
+from search_terms import backfill_search_terms, prefix_query, search_terms
+from suggestions import SuggestionEngine
+from leaderboard import PortfolioLeaderboard, current_week
 
 # CONFIGURAÇÃO INICIAL
 load_dotenv()
@@ -23,9 +43,18 @@ api_router = APIRouter(prefix="/api")
 SECRET_KEY = os.getenv("SECRET_KEY", "acode-lab-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# Valores do claim "ptype": indica em qual coleção o principal está
+PRINCIPAL_USER = "user"
+PRINCIPAL_COMPANY = "company"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_service = PasswordService(
+    max_workers=int(os.getenv("PASSWORD_POOL_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_POOL_MAX_PENDING", "32")),
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="api/auth/token", auto_error=False)
 
 # MONGODB CONFIGURAÇÃO
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
@@ -33,6 +62,96 @@ DB_NAME = os.getenv("DB_NAME", "acode_lab")
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
+# CACHE DE PRINCIPAIS
+# Caminho quente da autenticação: só os campos que os handlers leem de current_user.
+# O perfil (bio, skills, portfólio...) fica em user_profiles, ver profiles.py
+PRINCIPAL_PROJECTION = {field: 1 for field in (
+    "id", "username", "email", "rank", "pc_points", "pcon_points", "pcons",
+    "is_admin", "is_company", "is_bot", "is_banned", "is_muted", "is_silenced",
+    "ban_reason", "ban_expires", "role", "profile_image", "created_at",
+    "followers_count", "following_count",
+)}
+COMPANY_PRINCIPAL_PROJECTION = {"password_hash": 0}
+principal_cache = PrincipalCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30")),
+)
+revoked_tokens = TokenRevocationList(db.revoked_tokens)
+tag_stats = TagStats(db.tag_stats)
+
+# last_active é gravado em lote, não a cada requisição
+activity_tracker = ActivityTracker(
+    db.users,
+    db.companies,
+    interval=float(os.getenv("ACTIVITY_FLUSH_SECONDS", "1")),
+    max_pending=int(os.getenv("ACTIVITY_MAX_PENDING", "5000")),
+)
+
+# Visualizações de perguntas/artigos agregadas em memória (ver ViewCounter)
+view_counter = ViewCounter(
+    db,
+    interval=float(os.getenv("VIEW_FLUSH_SECONDS", "2")),
+    max_pending=int(os.getenv("VIEW_MAX_PENDING", "1000")),
+    derived={"questions": REFRESH_HOT_SCORE},
+)
+# Índice MinHash/LSH de perguntas quase duplicadas (reconstruído no startup)
+question_similarity = QuestionSimilarity(
+    threshold=float(os.getenv("SIMILARITY_THRESHOLD", "0.5")),
+    workers=int(os.getenv("SIMILARITY_POOL_WORKERS", "2")),
+)
+follow_graph = FollowGraph(db)
+user_profiles = UserProfiles(db)
+# Likes de posts virais distribuídos em shards (ver sharded_counter.py)
+like_counter = ShardedCounter(
+    db,
+    "posts",
+    "likes",
+    shards=int(os.getenv("LIKE_SHARDS", "16")),
+    hot_rate=float(os.getenv("LIKE_HOT_WRITES_PER_SECOND", "20")),
+)
+# Feeds dos usuários ativos e posts em memória (ver feed_cache.py)
+feed_cache = FeedCache(
+    size_per_user=int(os.getenv("FEED_CACHE_SIZE_PER_USER", "200")),
+    max_posts=int(os.getenv("FEED_CACHE_MAX_POSTS", "20000")),
+    post_ttl=float(os.getenv("FEED_CACHE_POST_TTL_SECONDS", "30")),
+    idle_seconds=float(os.getenv("FEED_CACHE_IDLE_SECONDS", "900")),
+    memory_budget=int(os.getenv("FEED_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+    ring_ttl=float(os.getenv("FEED_CACHE_RING_TTL_SECONDS", "30")),
+)
+# Timelines da home do Connect (fan-out na escrita, ver timeline.py)
+timeline = TimelineFanout(
+    db,
+    batch_size=int(os.getenv("TIMELINE_FANOUT_BATCH", "1000")),
+    max_followers=int(os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", "5000")),
+    cache=feed_cache,
+)
+# Reconciliação periódica dos contadores desnormalizados (likes, votos, respostas...)
+reconciler = Reconciler(
+    db,
+    COUNTER_CHECKS,
+    batch_size=int(os.getenv("RECONCILE_BATCH_SIZE", "500")),
+    pause=float(os.getenv("RECONCILE_PAUSE_SECONDS", "0.1")),
+    interval=float(os.getenv("RECONCILE_INTERVAL_SECONDS", "21600")),
+)
+# Sugestões de "quem seguir" recalculadas em lote num processo separado
+suggestion_engine = SuggestionEngine(
+    db,
+    top_k=int(os.getenv("SUGGESTIONS_TOP_K", "20")),
+    interval=float(os.getenv("SUGGESTIONS_INTERVAL_SECONDS", "21600")),
+    max_age=float(os.getenv("SUGGESTIONS_MAX_AGE_SECONDS", "86400")),
+)
+# Ranking semanal de portfólios em memória; pontos dos donos gravados em segundo plano
+portfolio_leaderboard = PortfolioLeaderboard(
+    db,
+    refresh_interval=float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "30")),
+)
+portfolio_points = ViewCounter(
+    db,
+    interval=float(os.getenv("PORTFOLIO_VOTE_FLUSH_SECONDS", "2")),
+    max_pending=int(os.getenv("VIEW_MAX_PENDING", "1000")),
+    field="pc_points",
+)
+
 # CORS CONFIGURAÇÃO
 app.add_middleware(
     CORSMiddleware,
@@ -83,8 +202,8 @@ class User(BaseModel):
     skills: List[str] = []
     experience: Optional[str] = ""
     portfolio_projects: List[dict] = []
-    following: List[str] = []
-    followers: List[str] = []
+    following_count: int = 0  # arestas em db.follows, ver follows.py
+    followers_count: int = 0
     achievements: List[str] = []
     theme_color: str = "#D97745"
     banner_image: Optional[str] = ""
@@ -92,6 +211,7 @@ class User(BaseModel):
     social_links: Dict[str, str] = {}
     showcase_projects: List[str] = []
     featured_skills: List[str] = []
+    # Os campos de perfil acima são gravados em user_profiles (profiles.PROFILE_FIELDS)
 
 class Company(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -120,8 +240,11 @@ class Question(BaseModel):
     author_username: str
     upvotes: int = 0
     downvotes: int = 0
+    score: int = 0  # upvotes - downvotes, mantido por apply_vote
     views: int = 0
     answers_count: int = 0
+    hot_score: float = 0.0  # ver ranking.py; recalculado a cada voto/resposta/visualização
+    search_terms: List[str] = []  # ver search_terms.py; busca por prefixo
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -134,6 +257,7 @@ class Answer(BaseModel):
     author_username: str
     upvotes: int = 0
     downvotes: int = 0
+    score: int = 0  # upvotes - downvotes, mantido por apply_vote
     is_validated: bool = False
     is_accepted: bool = False
     validated_by: Optional[str] = None
@@ -248,10 +372,10 @@ class UserResponse(BaseModel):
     is_banned: bool
     is_muted: bool
     created_at: datetime
-    bio: Optional[str]
-    location: Optional[str]
-    skills: List[str]
-    achievements: List[str]
+    bio: Optional[str] = ""
+    location: Optional[str] = ""
+    skills: List[str] = []
+    achievements: List[str] = []
 
 class QuestionCreate(BaseModel):
     title: str
@@ -291,13 +415,29 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 # UTILITÁRIOS
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+password_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Authentication service busy, try again shortly",
+    headers={"Retry-After": "1"},
+)
+
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_service.verify(plain_password, hashed_password)
+    except PasswordServiceBusy:
+        raise password_busy_exception
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_service.hash(password)
+    except PasswordServiceBusy:
+        raise password_busy_exception
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -309,6 +449,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(data: dict):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def principal_type(user: dict) -> str:
+    return PRINCIPAL_COMPANY if user.get("is_company") else PRINCIPAL_USER
+
+def issue_tokens(user: dict) -> dict:
+    claims = {"sub": user["id"], "ptype": principal_type(user)}
+    access_token = create_access_token(
+        data=claims,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = create_refresh_token(data=claims)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "user": UserResponse(**user)
+    }
+
+async def with_profile(user: dict) -> dict:
+    """The principal plus its profile fields, for responses that show them."""
+    if user.get("is_company"):
+        return user
+    return {**user, **await user_profiles.get(user["id"], legacy=user)}
+
 def calculate_rank(pc_points: int) -> UserRank:
     if pc_points >= 15000: return UserRank.GURU
     elif pc_points >= 5000: return UserRank.MESTRE
@@ -317,6 +486,31 @@ def calculate_rank(pc_points: int) -> UserRank:
     elif pc_points >= 100: return UserRank.APRENDIZ
     else: return UserRank.INICIANTE
 
+async def load_principal(user_id: str, ptype: Optional[str] = None) -> Optional[dict]:
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    if ptype == PRINCIPAL_COMPANY:
+        user = await db.companies.find_one({"id": user_id}, COMPANY_PRINCIPAL_PROJECTION)
+    elif ptype == PRINCIPAL_USER:
+        user = await db.users.find_one({"id": user_id}, PRINCIPAL_PROJECTION)
+    else:
+        # Tokens emitidos antes do claim "ptype": tenta users e depois companies
+        user = await db.users.find_one({"id": user_id}, PRINCIPAL_PROJECTION)
+        if user is None:
+            user = await db.companies.find_one({"id": user_id}, COMPANY_PRINCIPAL_PROJECTION)
+            if user is not None:
+                ptype = PRINCIPAL_COMPANY
+    
+    if user is None:
+        return None
+    if ptype == PRINCIPAL_COMPANY:
+        user["is_company"] = True
+    
+    principal_cache.set(user_id, user)
+    return user
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -326,20 +520,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("type") == "refresh":
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"id": user_id})
+    user = await load_principal(user_id, payload.get("ptype"))
     if user is None:
-        user = await db.companies.find_one({"id": user_id})
-        if user is None:
-            raise credentials_exception
-        user["is_company"] = True
+        raise credentials_exception
     
+    activity_tracker.record(user_id, user.get("is_company", False))
     return user
 
+async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional)):
+    """Like get_current_user, but anonymous requests get None instead of a 401.
+
+    An expired, revoked or unknown token is treated as anonymous too: public
+    listings must not log out a stale session, they just skip the per-user
+    annotations.
+    """
+    if not token:
+        return None
+    try:
+        return await get_current_user(token)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_401_UNAUTHORIZED:
+            raise
+        return None
+
 # AUTHENTICATION ROUTES
 @api_router.post("/auth/register", response_model=dict)
 async def register_user(user: UserCreate):
@@ -349,7 +557,7 @@ async def register_user(user: UserCreate):
         raise HTTPException(status_code=400, detail="Email or username already registered")
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_user = User(
         username=user.username,
         email=user.email,
@@ -357,19 +565,29 @@ async def register_user(user: UserCreate):
         achievements=["first_join"]
     )
     
-    await db.users.insert_one(new_user.dict())
+    user_doc = new_user.dict()
+    profile = split_profile(user_doc)
+    await db.users.insert_one(user_doc)
+    await user_profiles.create(new_user.id, profile)
     return {"message": "User created successfully", "user_id": new_user.id}
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    # Check user
-    user = await db.users.find_one({"email": form_data.username})
-    if not user:
-        user = await db.companies.find_one({"email": form_data.username})
-        if user:
-            user["is_company"] = True
+    # Check user: users e companies numa única ida ao banco
+    candidates = await db.users.aggregate([
+        {"$match": {"email": form_data.username}},
+        {"$unionWith": {
+            "coll": "companies",
+            "pipeline": [
+                {"$match": {"email": form_data.username}},
+                {"$set": {"is_company": True}}
+            ]
+        }},
+        {"$limit": 1}
+    ]).to_list(1)
+    user = candidates[0] if candidates else None
     
-    if not user or not verify_password(form_data.password, user["password_hash"]):
+    if not user or not await verify_password(form_data.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -377,23 +595,55 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
     
     # Update last active
-    collection = db.companies if user.get("is_company") else db.users
-    await collection.update_one(
-        {"id": user["id"]},
-        {"$set": {"last_active": datetime.utcnow()}}
-    )
+    activity_tracker.record(user["id"], user.get("is_company", False))
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["id"]}, expires_delta=access_token_expires
+    return issue_tokens(await with_profile(user))
+
+async def consume_refresh_token(refresh_token: str) -> dict:
+    """Validate and revoke a refresh token, returning its claims. No bcrypt involved."""
+    invalid_refresh_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    try:
+        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise invalid_refresh_exception
+    
+    user_id = payload.get("sub")
+    jti = payload.get("jti")
+    if payload.get("type") != "refresh" or user_id is None or jti is None:
+        raise invalid_refresh_exception
     
-    user_response = UserResponse(**user)
-    return {"access_token": access_token, "token_type": "bearer", "user": user_response}
+    # Single-use: the revocation insert fails if the token was already rotated
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    if not await revoked_tokens.revoke(jti, expires_at):
+        raise invalid_refresh_exception
+    return payload
+
+@api_router.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest):
+    claims = await consume_refresh_token(request.refresh_token)
+    
+    user = await load_principal(claims["sub"], claims.get("ptype"))
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return issue_tokens(await with_profile(user))
+
+@api_router.post("/auth/logout")
+async def logout(request: RefreshRequest):
+    await consume_refresh_token(request.refresh_token)
+    return {"message": "Logged out successfully"}
 
 @api_router.get("/auth/me", response_model=UserResponse)
 async def read_users_me(current_user: dict = Depends(get_current_user)):
-    return UserResponse(**current_user)
+    return UserResponse(**await with_profile(current_user))
 
 # QUESTIONS ROUTES
 @api_router.post("/questions")
@@ -406,21 +656,68 @@ async def create_question(question: QuestionCreate, current_user: dict = Depends
         author_id=current_user["id"],
         author_username=current_user["username"]
     )
+    new_question.hot_score = hot_score(0, 0, 0, new_question.created_at)
+    new_question.search_terms = search_terms(new_question.title, new_question.tags)
+    similar = question_similarity.similar(new_question.title, new_question.content)
     
     await db.questions.insert_one(new_question.dict())
+    await tag_stats.record("questions", new_question.tags)
+    question_similarity.add(new_question.id, new_question.title, new_question.content)
     
     # Award PC points
     await db.users.update_one(
         {"id": current_user["id"]},
         {"$inc": {"pc_points": 2, "pcon_points": 5}}
     )
+    principal_cache.invalidate(current_user["id"])
     
-    return {"message": "Question created successfully", "question_id": new_question.id}
+    response = {"message": "Question created successfully", "question_id": new_question.id}
+    if similar:
+        response["similar_questions"] = similar
+    return response
+
+QUESTION_SORTS = {
+    "new": [("created_at", -1), ("id", -1)],
+    "hot": [("hot_score", -1), ("id", -1)],
+}
 
 @api_router.get("/questions")
-async def get_questions(skip: int = 0, limit: int = 50, search: str = None):
+async def get_questions(
+    skip: int = 0,
+    limit: int = 50,
+    search: str = None,
+    search_mode: str = "text",
+    cursor: Optional[str] = None,
+    sort: str = "new",
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """List questions.
+
+    ``sort`` is "new" (created_at) or "hot" (precomputed hot_score, see
+    ranking.py). Passing ``cursor`` (empty for the first page) switches to
+    keyset pagination over that order and returns
+    ``{"items": [...], "next_cursor": ...}``; without it the legacy skip/limit
+    list is returned. Authenticated callers also get ``my_vote`` per question.
+
+    ``search`` uses the text index by default, which matches whole (stemmed)
+    words only; when it finds nothing on the first page, titles and tags
+    starting with the search string are tried instead, so partial input like
+    "pyth" still finds "Python". That fallback is an index range on the
+    lower-cased ``search_terms`` field (title words and tags), never a
+    collection scan. ``search_mode=regex`` keeps the old substring search.
+    """
+    if cursor is not None and search:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not available for search")
+    
+    if sort not in QUESTION_SORTS:
+        raise HTTPException(status_code=400, detail="sort must be 'new' or 'hot'")
+    
+    limit = max(1, min(limit, 100))
     query = {}
-    if search:
+    projection = {"search_terms": 0}
+    sort = QUESTION_SORTS[sort]
+    if search and search_mode == "regex":
+        # Busca por substring: varre a coleção inteira, mantida só por compatibilidade
         query = {
             "$or": [
                 {"title": {"$regex": search, "$options": "i"}},
@@ -429,8 +726,26 @@ async def get_questions(skip: int = 0, limit: int = 50, search: str = None):
                 {"author_username": {"$regex": search, "$options": "i"}}
             ]
         }
-    
-    questions = await db.questions.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    elif search:
+        # Índice de texto "questions_text": relevância com pesos e stemming em português
+        query = {"$text": {"$search": search}}
+        projection = {"search_terms": 0, "relevance": {"$meta": "textScore"}}
+        sort = [("relevance", {"$meta": "textScore"}), ("created_at", -1)]
+    
+    if cursor is not None:
+        try:
+            query = apply_cursor(query, sort, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        skip = 0
+    
+    questions = await db.questions.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(limit)
+    if not questions and search and search_mode != "regex" and skip == 0 and prefix_query(search):
+        # $text não casa prefixos: cai para palavras do título/tags começando com os termos
+        questions = await db.questions.find(
+            prefix_query(search), {"search_terms": 0}
+        ).sort(QUESTION_SORTS["new"]).limit(limit).to_list(limit)
+    page_cursor = next_cursor(questions, sort, limit) if cursor is not None else None
     
     # Convert to serializable format
     serializable_questions = []
@@ -447,77 +762,211 @@ async def get_questions(skip: int = 0, limit: int = 50, search: str = None):
             
         serializable_questions.append(question)
     
+    if current_user:
+        await annotate_votes(db.votes, current_user["id"], "question", serializable_questions)
+    
+    if cursor is not None:
+        return {"items": serializable_questions, "next_cursor": page_cursor}
     return serializable_questions
 
+@api_router.get("/questions/similar")
+async def get_similar_questions(title: str, content: str = "", limit: int = 5):
+    """Near-duplicates of a draft question (MinHash/LSH, see similarity.py)."""
+    limit = max(1, min(limit, 20))
+    return question_similarity.similar(title, content, limit=limit)
+
 @api_router.get("/questions/{question_id}")
 async def get_question(question_id: str):
-    question = await db.questions.find_one({"id": question_id})
+    question = await db.questions.find_one({"id": question_id}, {"search_terms": 0})
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    return question
+    return BSONJSONResponse(question)
+
+# Ordem de leitura das respostas; o índice (question_id + ANSWER_SORT) cobre o sort
+ANSWER_SORT = [("is_accepted", -1), ("score", -1), ("created_at", -1), ("id", -1)]
+ANSWER_LIST_PROJECTION = {"_id": 0, "question_id": 0, "validated_by": 0, "validated_at": 0}
+
+@api_router.get("/questions/{question_id}/page")
+async def get_question_page(
+    question_id: str,
+    answers_skip: int = 0,
+    answers_limit: int = 20,
+    record_view: bool = True,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """Everything the question page needs, assembled by a single aggregation.
+
+    Returns the question, a page of answers (accepted first, then by score,
+    then newest), the caller's votes on the question and those answers, and
+    rank snapshots of every author shown.
+    """
+    pipeline = [
+        {"$match": {"id": question_id}},
+        {"$project": {"_id": 0, "search_terms": 0}},
+        {"$lookup": {
+            "from": "answers",
+            "localField": "id",
+            "foreignField": "question_id",
+            "pipeline": [
+                {"$sort": dict(ANSWER_SORT)},
+                {"$skip": answers_skip},
+                {"$limit": answers_limit},
+                {"$project": ANSWER_LIST_PROJECTION}
+            ],
+            "as": "answers"
+        }},
+        # Lookups de igualdade sobre arrays usam os índices users.id / votes.target_id
+        {"$addFields": {
+            "author_ids": {"$concatArrays": [["$author_id"], "$answers.author_id"]},
+            "target_ids": {"$concatArrays": [["$id"], "$answers.id"]}
+        }},
+        {"$lookup": {
+            "from": "users",
+            "localField": "author_ids",
+            "foreignField": "id",
+            "pipeline": [
+                {"$project": {"_id": 0, "id": 1, "username": 1, "rank": 1, "pc_points": 1}}
+            ],
+            "as": "authors"
+        }}
+    ]
+    if current_user:
+        pipeline.append({"$lookup": {
+            "from": "votes",
+            "localField": "target_ids",
+            "foreignField": "target_id",
+            "pipeline": [
+                {"$match": {
+                    "user_id": current_user["id"],
+                    "target_type": {"$in": ["question", "answer"]}
+                }},
+                {"$project": {"_id": 0, "target_id": 1, "vote_type": 1}}
+            ],
+            "as": "my_votes"
+        }})
+    pipeline.append({"$project": {"author_ids": 0, "target_ids": 0}})
+    
+    pages = await db.questions.aggregate(pipeline).to_list(1)
+    if not pages:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    question = pages[0]
+    answers = question.pop("answers")
+    authors = {author["id"]: author for author in question.pop("authors")}
+    my_votes = {vote["target_id"]: vote["vote_type"] for vote in question.pop("my_votes", [])}
+    
+    if record_view:
+        view_counter.add("questions", question_id)
+    
+    return BSONJSONResponse({
+        "question": question,
+        "answers": answers,
+        "answers_next_cursor": next_cursor(answers, ANSWER_SORT, answers_limit),
+        "authors": authors,
+        "my_votes": my_votes
+    })
 
 @api_router.post("/questions/{question_id}/view")
 async def increment_question_views(question_id: str):
-    await db.questions.update_one(
-        {"id": question_id},
-        {"$inc": {"views": 1}}
-    )
+    view_counter.add("questions", question_id)
     return {"message": "View recorded"}
 
-@api_router.post("/questions/{question_id}/vote")
-async def vote_question(question_id: str, vote_data: dict, current_user: dict = Depends(get_current_user)):
-    vote_type = vote_data.get("vote_type")
-    
-    question = await db.questions.find_one({"id": question_id})
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    
-    existing_vote = await db.votes.find_one({
-        "user_id": current_user["id"],
-        "target_id": question_id,
-        "target_type": "question"
-    })
-    
-    if existing_vote:
-        old_type = existing_vote["vote_type"]
-        if old_type != vote_type:
-            await db.votes.update_one(
-                {"id": existing_vote["id"]},
-                {"$set": {"vote_type": vote_type}}
+VOTE_COUNTER_FIELDS = {"up": "upvotes", "down": "downvotes"}
+VOTE_SCORE = {"up": 1, "down": -1}
+
+async def apply_vote(
+    collection,
+    target_id: str,
+    target_type: str,
+    user_id: str,
+    vote_type: str,
+    hot_ranked: bool = False
+) -> Optional[str]:
+    """Upsert the caller's vote and adjust the target's counters in one update.
+
+    The unique (user_id, target_id, target_type) index makes the upsert the
+    single source of truth: the document returned *before* the update tells us
+    which counters to move, even under concurrent double-clicks. Returns the
+    previous vote type, or None for a new vote. ``hot_ranked`` targets also get
+    their hot_score refreshed within the same update.
+    """
+    if vote_type not in VOTE_COUNTER_FIELDS:
+        raise HTTPException(status_code=400, detail="vote_type must be 'up' or 'down'")
+    
+    vote_key = {"user_id": user_id, "target_id": target_id, "target_type": target_type}
+    vote = Vote(**vote_key, vote_type=vote_type).dict()
+    on_insert = {k: v for k, v in vote.items() if k not in vote_key and k != "vote_type"}
+    
+    for attempt in range(2):
+        try:
+            previous = await db.votes.find_one_and_update(
+                vote_key,
+                {"$set": {"vote_type": vote_type}, "$setOnInsert": on_insert},
+                projection={"_id": 0, "vote_type": 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
             )
-            
-            if old_type == "up":
-                await db.questions.update_one({"id": question_id}, {"$inc": {"upvotes": -1}})
-            else:
-                await db.questions.update_one({"id": question_id}, {"$inc": {"downvotes": -1}})
-                
-            if vote_type == "up":
-                await db.questions.update_one({"id": question_id}, {"$inc": {"upvotes": 1}})
-            else:
-                await db.questions.update_one({"id": question_id}, {"$inc": {"downvotes": 1}})
-        
-        return {"message": "Vote updated"}
-    else:
-        vote = Vote(
-            user_id=current_user["id"],
-            target_id=question_id,
-            target_type="question",
-            vote_type=vote_type
-        )
-        
-        await db.votes.insert_one(vote.dict())
-        
-        if vote_type == "up":
-            await db.questions.update_one({"id": question_id}, {"$inc": {"upvotes": 1}})
+            break
+        except DuplicateKeyError:
+            # Dois upserts simultâneos: o segundo passa a encontrar o voto existente
+            if attempt:
+                raise
+    
+    old_type = previous.get("vote_type") if previous is not None else None
+    if old_type == vote_type:
+        return old_type
+    
+    inc = {VOTE_COUNTER_FIELDS[vote_type]: 1, "score": VOTE_SCORE[vote_type]}
+    if old_type in VOTE_COUNTER_FIELDS:
+        inc[VOTE_COUNTER_FIELDS[old_type]] = -1
+        inc["score"] -= VOTE_SCORE[old_type]
+    
+    update = inc_with_hot_score(inc) if hot_ranked else {"$inc": inc}
+    result = await collection.update_one({"id": target_id}, update)
+    if result.matched_count == 0:
+        # Alvo inexistente: desfaz o voto gravado pelo upsert
+        if previous is None:
+            await db.votes.delete_one(vote_key)
         else:
-            await db.questions.update_one({"id": question_id}, {"$inc": {"downvotes": 1}})
-        
-        return {"message": "Vote recorded"}
+            await db.votes.update_one(vote_key, {"$set": {"vote_type": old_type}})
+        raise HTTPException(status_code=404, detail=f"{target_type.capitalize()} not found")
+    
+    return old_type
+
+@api_router.post("/questions/{question_id}/vote")
+async def vote_question(question_id: str, vote_data: dict, current_user: dict = Depends(get_current_user)):
+    previous = await apply_vote(
+        db.questions, question_id, "question", current_user["id"], vote_data.get("vote_type"), hot_ranked=True
+    )
+    return {"message": "Vote updated" if previous else "Vote recorded"}
 
 @api_router.get("/questions/{question_id}/answers")
-async def get_question_answers(question_id: str):
-    answers = await db.answers.find({"question_id": question_id}).sort("created_at", -1).to_list(100)
-    return answers
+async def get_question_answers(
+    question_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """Answers ordered accepted first, then by net score, then newest.
+
+    With ``cursor`` (empty for the first page) the response is
+    ``{"items": [...], "next_cursor": ...}``; otherwise the plain list.
+    Authenticated callers also get ``my_vote`` per answer.
+    """
+    limit = max(1, min(limit, 100))
+    query = {"question_id": question_id}
+    if cursor is not None:
+        try:
+            query = apply_cursor(query, ANSWER_SORT, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    answers = await db.answers.find(query, ANSWER_LIST_PROJECTION).sort(ANSWER_SORT).limit(limit).to_list(limit)
+    if current_user:
+        await annotate_votes(db.votes, current_user["id"], "answer", answers)
+    if cursor is not None:
+        return BSONJSONResponse({"items": answers, "next_cursor": next_cursor(answers, ANSWER_SORT, limit)})
+    return BSONJSONResponse(answers)
 
 @api_router.post("/questions/{question_id}/answers")
 async def create_answer(question_id: str, answer: AnswerCreate, current_user: dict = Depends(get_current_user)):
@@ -540,7 +989,7 @@ async def create_answer(question_id: str, answer: AnswerCreate, current_user: di
     # Update question answer count
     await db.questions.update_one(
         {"id": question_id},
-        {"$inc": {"answers_count": 1}}
+        inc_with_hot_score({"answers_count": 1})
     )
     
     return {"message": "Answer submitted! Waiting for admin validation.", "answer_id": new_answer.id}
@@ -548,53 +997,15 @@ async def create_answer(question_id: str, answer: AnswerCreate, current_user: di
 # ANSWERS ROUTES
 @api_router.post("/answers/{answer_id}/vote")
 async def vote_answer(answer_id: str, vote_data: dict, current_user: dict = Depends(get_current_user)):
-    vote_type = vote_data.get("vote_type")
-    
-    answer = await db.answers.find_one({"id": answer_id})
-    if not answer:
-        raise HTTPException(status_code=404, detail="Answer not found")
-    
-    existing_vote = await db.votes.find_one({
-        "user_id": current_user["id"],
-        "target_id": answer_id,
-        "target_type": "answer"
-    })
-    
-    if existing_vote:
-        old_type = existing_vote["vote_type"]
-        if old_type != vote_type:
-            await db.votes.update_one(
-                {"id": existing_vote["id"]},
-                {"$set": {"vote_type": vote_type}}
-            )
-            
-            if old_type == "up":
-                await db.answers.update_one({"id": answer_id}, {"$inc": {"upvotes": -1}})
-            else:
-                await db.answers.update_one({"id": answer_id}, {"$inc": {"downvotes": -1}})
-                
-            if vote_type == "up":
-                await db.answers.update_one({"id": answer_id}, {"$inc": {"upvotes": 1}})
-            else:
-                await db.answers.update_one({"id": answer_id}, {"$inc": {"downvotes": 1}})
-        
-        return {"message": "Vote updated"}
-    else:
-        vote = Vote(
-            user_id=current_user["id"],
-            target_id=answer_id,
-            target_type="answer",
-            vote_type=vote_type
-        )
-        
-        await db.votes.insert_one(vote.dict())
-        
-        if vote_type == "up":
-            await db.answers.update_one({"id": answer_id}, {"$inc": {"upvotes": 1}})
-        else:
-            await db.answers.update_one({"id": answer_id}, {"$inc": {"downvotes": 1}})
-        
-        return {"message": "Vote recorded"}
+    previous = await apply_vote(db.answers, answer_id, "answer", current_user["id"], vote_data.get("vote_type"))
+    return {"message": "Vote updated" if previous else "Vote recorded"}
+
+# TAGS ROUTES
+@api_router.get("/tags")
+async def get_tags(prefix: str = "", limit: int = 20):
+    """Most used tags (questions, posts, articles, job skills), optionally by prefix."""
+    limit = max(1, min(limit, 100))
+    return BSONJSONResponse(await tag_stats.top(limit=limit, prefix=prefix))
 
 # USER ROUTES
 @api_router.put("/users/profile")
@@ -609,18 +1020,23 @@ async def update_profile(profile_data: dict, current_user: dict = Depends(get_cu
     ]
     update_data = {k: v for k, v in profile_data.items() if k in allowed_fields}
     
-    await db.users.update_one(
-        {"id": current_user["id"]},
-        {"$set": update_data}
-    )
+    if update_data:
+        await user_profiles.update(current_user["id"], update_data)
     
     return {"message": "Profile updated successfully"}
 
+@api_router.get("/users/suggestions")
+async def get_follow_suggestions(limit: int = 10, current_user: dict = Depends(get_current_user)):
+    """Accounts to follow, best first, each with its score and the reasons behind it."""
+    limit = max(1, min(limit, suggestion_engine.top_k))
+    return BSONJSONResponse(await suggestion_engine.get(current_user["id"], limit=limit))
+
 @api_router.get("/users/{user_id}/profile")
 async def get_user_profile(user_id: str):
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    profile = await user_profiles.get(user_id, legacy=user)
     
     return {
         "id": user["id"],
@@ -628,23 +1044,9 @@ async def get_user_profile(user_id: str):
         "rank": user["rank"],
         "pc_points": user["pc_points"],
         "pcon_points": user["pcon_points"],
-        "bio": user.get("bio", ""),
-        "location": user.get("location", ""),
-        "website": user.get("website", ""),
-        "github": user.get("github", ""),
-        "linkedin": user.get("linkedin", ""),
-        "skills": user.get("skills", []),
-        "experience": user.get("experience", ""),
-        "achievements": user.get("achievements", []),
-        "theme_color": user.get("theme_color", "#D97745"),
-        "banner_image": user.get("banner_image", ""),
-        "custom_title": user.get("custom_title", ""),
-        "social_links": user.get("social_links", {}),
-        "showcase_projects": user.get("showcase_projects", []),
-        "featured_skills": user.get("featured_skills", []),
-        "portfolio_projects": user.get("portfolio_projects", []),
-        "following": len(user.get("following", [])),
-        "followers": len(user.get("followers", [])),
+        **profile,
+        "following": user.get("following_count", 0),
+        "followers": user.get("followers_count", 0),
         "created_at": user["created_at"]
     }
 
@@ -653,47 +1055,91 @@ async def follow_user(user_id: str, current_user: dict = Depends(get_current_use
     if user_id == current_user["id"]:
         raise HTTPException(status_code=400, detail="You cannot follow yourself")
     
-    target_user = await db.users.find_one({"id": user_id})
-    if not target_user:
+    if not await db.users.count_documents({"id": user_id}, limit=1):
         raise HTTPException(status_code=404, detail="User not found")
     
-    current_user_data = await db.users.find_one({"id": current_user["id"]})
-    following_list = current_user_data.get("following", [])
-    
-    if user_id in following_list:
-        # Unfollow
-        await db.users.update_one(
-            {"id": current_user["id"]},
-            {"$pull": {"following": user_id}}
-        )
-        await db.users.update_one(
-            {"id": user_id},
-            {"$pull": {"followers": current_user["id"]}}
-        )
+    if await follow_graph.unfollow(current_user["id"], user_id):
+        principal_cache.invalidate(current_user["id"], user_id)
+        await timeline.unfollowed(current_user["id"], user_id)
         return {"message": "User unfollowed"}
-    else:
-        # Follow
-        await db.users.update_one(
-            {"id": current_user["id"]},
-            {"$addToSet": {"following": user_id}}
-        )
-        await db.users.update_one(
-            {"id": user_id},
-            {"$addToSet": {"followers": current_user["id"]}}
-        )
-        return {"message": "User followed successfully"}
+    
+    await follow_graph.follow(current_user["id"], user_id)
+    principal_cache.invalidate(current_user["id"], user_id)
+    timeline.followed(current_user["id"], user_id)
+    return {"message": "User followed successfully"}
+
+@api_router.get("/users/{user_id}/followers")
+async def get_user_followers(user_id: str, limit: int = 20, cursor: Optional[str] = None):
+    """Users following ``user_id``, most recent first: ``{"items": [...], "next_cursor": ...}``."""
+    limit = max(1, min(limit, 100))
+    try:
+        page = await follow_graph.followers(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return BSONJSONResponse(page)
+
+@api_router.get("/users/{user_id}/following")
+async def get_user_following(user_id: str, limit: int = 20, cursor: Optional[str] = None):
+    """Users ``user_id`` follows, most recent first: ``{"items": [...], "next_cursor": ...}``."""
+    limit = max(1, min(limit, 100))
+    try:
+        page = await follow_graph.following(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return BSONJSONResponse(page)
 
 # CONNECT ROUTES
+POST_LIST_SORT = [("created_at", -1), ("id", -1)]
+
 @api_router.get("/connect/posts")
-async def get_connect_posts(skip: int = 0, limit: int = 20, user_id: str = None):
+async def get_connect_posts(
+    skip: int = 0,
+    limit: int = 20,
+    user_id: str = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """List Connect posts, newest first.
+
+    ``fields`` (comma-separated) returns only those fields plus ``id`` and
+    ``created_at``. Passing ``cursor`` (empty for the first page) switches to
+    keyset pagination and returns ``{"items": [...], "next_cursor": ...}``.
+    Authenticated callers also get ``liked_by_me`` per post.
+    """
     query = {}
     if user_id:
         query["author_id"] = user_id
     
-    posts = await db.posts.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    # Converter para JSON serializável
-    return json.loads(json_util.dumps(posts))
+    try:
+        projection = field_projection(fields, Post.model_fields, always=("id", "created_at", like_counter.flag))
+        if cursor is not None:
+            query = apply_cursor(query, POST_LIST_SORT, cursor)
+            skip = 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    limit = max(1, min(limit, 100))
+    posts = await db.posts.find(query, projection).sort(POST_LIST_SORT).skip(skip).limit(limit).to_list(limit)
+    await like_counter.apply(posts)
+    if current_user:
+        await annotate_likes(db.likes, current_user["id"], "post", posts)
+    
+    if cursor is not None:
+        return BSONJSONResponse({"items": posts, "next_cursor": next_cursor(posts, POST_LIST_SORT, limit)})
+    return BSONJSONResponse(posts)
+
+@api_router.get("/connect/feed")
+async def get_connect_feed(limit: int = 20, cursor: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Home feed: own posts and posts from followed users, newest first, with ``liked_by_me``."""
+    limit = max(1, min(limit, 50))
+    try:
+        page = await timeline.read(current_user["id"], limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    await like_counter.apply(page["items"])
+    await annotate_likes(db.likes, current_user["id"], "post", page["items"])
+    return BSONJSONResponse(page)
 
 @api_router.post("/connect/posts")
 async def create_post(post: PostCreate, current_user: dict = Depends(get_current_user)):
@@ -708,12 +1154,15 @@ async def create_post(post: PostCreate, current_user: dict = Depends(get_current
     )
     
     await db.posts.insert_one(new_post.dict())
+    await tag_stats.record("posts", new_post.tags)
+    timeline.publish(new_post.dict())
     
     # Award PC points for creating posts
     await db.users.update_one(
         {"id": current_user["id"]},
         {"$inc": {"pc_points": 1, "pcon_points": 2}}
     )
+    principal_cache.invalidate(current_user["id"])
     
     return {"message": "Post created successfully", "post_id": new_post.id}
 
@@ -733,7 +1182,8 @@ async def toggle_like_post(post_id: str, current_user: dict = Depends(get_curren
     if existing_like:
         # Unlike
         await db.likes.delete_one({"id": existing_like["id"]})
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes": -1}})
+        if not await like_counter.increment(post, -1):
+            feed_cache.adjust_post(post_id, "likes", -1)
         return {"message": "Post unliked", "liked": False}
     else:
         # Like
@@ -744,22 +1194,64 @@ async def toggle_like_post(post_id: str, current_user: dict = Depends(get_curren
             target_type="post"
         )
         await db.likes.insert_one(like.dict())
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes": 1}})
+        if not await like_counter.increment(post, 1):
+            feed_cache.adjust_post(post_id, "likes", 1)
         
         # Award points to post author
         await db.users.update_one(
             {"id": post["author_id"]},
             {"$inc": {"pc_points": 1}}
         )
+        principal_cache.invalidate(post["author_id"])
         
         return {"message": "Post liked", "liked": True}
 
+COMMENT_SORTS = {
+    "oldest": [("created_at", 1), ("id", 1)],
+    "latest": [("created_at", -1), ("id", -1)],
+}
+
 @api_router.get("/connect/posts/{post_id}/comments")
-async def get_post_comments(post_id: str):
-    comments = await db.comments.find({"post_id": post_id}).sort("created_at", 1).to_list(100)
-    
-    # Converter para JSON serializável
-    return json.loads(json_util.dumps(comments))
+async def get_post_comments(
+    post_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    order: str = "oldest",
+    fields: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """Comments of a post.
+
+    ``order=latest`` is the "latest N + load more" mode: it returns the newest
+    ``limit`` comments (in chronological order) and a ``next_cursor`` for the
+    older ones. ``order=oldest`` with a ``cursor`` pages forward from the
+    first comment. Both return ``{"items": [...], "next_cursor": ...}``;
+    without either, the legacy list of the first ``limit`` comments is
+    returned. ``fields`` and ``liked_by_me`` work as in /connect/posts.
+    """
+    if order not in COMMENT_SORTS:
+        raise HTTPException(status_code=400, detail="order must be 'oldest' or 'latest'")
+    sort = COMMENT_SORTS[order]
+    paginated = cursor is not None or order == "latest"
+    
+    query = {"post_id": post_id}
+    try:
+        projection = field_projection(fields, Comment.model_fields, always=("id", "created_at"))
+        query = apply_cursor(query, sort, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    limit = max(1, min(limit, 100))
+    comments = await db.comments.find(query, projection).sort(sort).limit(limit).to_list(limit)
+    if current_user:
+        await annotate_likes(db.likes, current_user["id"], "comment", comments)
+    
+    if not paginated:
+        return BSONJSONResponse(comments)
+    page_cursor = next_cursor(comments, sort, limit)
+    if order == "latest":
+        comments.reverse()
+    return BSONJSONResponse({"items": comments, "next_cursor": page_cursor})
 
 @api_router.post("/connect/posts/{post_id}/comments")
 async def create_comment(post_id: str, comment: CommentCreate, current_user: dict = Depends(get_current_user)):
@@ -782,12 +1274,14 @@ async def create_comment(post_id: str, comment: CommentCreate, current_user: dic
         {"id": post_id},
         {"$inc": {"comments_count": 1}}
     )
+    feed_cache.adjust_post(post_id, "comments_count", 1)
     
     # Award points
     await db.users.update_one(
         {"id": current_user["id"]},
         {"$inc": {"pc_points": 1}}
     )
+    principal_cache.invalidate(current_user["id"])
     
     return {"message": "Comment created successfully", "comment_id": new_comment.id}
 
@@ -823,16 +1317,13 @@ async def toggle_like_comment(comment_id: str, current_user: dict = Depends(get_
 
 # PORTFOLIO ROUTES
 @api_router.get("/connect/portfolios/featured")
-async def get_featured_portfolios():
-    import datetime
-    current_week = datetime.datetime.now().strftime("%Y-W%U")
-    
-    portfolios = await db.portfolio_submissions.find({
-        "week_year": current_week
-    }).sort("votes", -1).limit(10).to_list(10)
-    
-    # Converter para JSON serializável
-    return json.loads(json_util.dumps(portfolios))
+async def get_featured_portfolios(request: Request):
+    """Top 10 portfolios of the week, served from memory; honours If-None-Match."""
+    body, etag = await portfolio_leaderboard.top()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @api_router.post("/connect/portfolios/submit")
 async def submit_portfolio(portfolio: PortfolioSubmissionCreate, current_user: dict = Depends(get_current_user)):
@@ -840,13 +1331,12 @@ async def submit_portfolio(portfolio: PortfolioSubmissionCreate, current_user: d
     if current_user.get("is_company"):
         raise HTTPException(status_code=403, detail="Companies cannot submit portfolios")
     
-    import datetime
-    current_week = datetime.datetime.now().strftime("%Y-W%U")
+    week = current_week()
     
     # Check if user already submitted this week
     existing = await db.portfolio_submissions.find_one({
         "user_id": current_user["id"],
-        "week_year": current_week
+        "week_year": week
     })
     
     if existing:
@@ -856,55 +1346,63 @@ async def submit_portfolio(portfolio: PortfolioSubmissionCreate, current_user: d
         **portfolio.dict(),
         user_id=current_user["id"],
         user_username=current_user["username"],
-        week_year=current_week
+        week_year=week
     )
     
     await db.portfolio_submissions.insert_one(new_submission.dict())
+    portfolio_leaderboard.add(new_submission.dict())
     
     # Award points for submission
     await db.users.update_one(
         {"id": current_user["id"]},
         {"$inc": {"pc_points": 5, "pcon_points": 10}}
     )
+    principal_cache.invalidate(current_user["id"])
     
     return {"message": "Portfolio submitted successfully", "submission_id": new_submission.id}
 
 @api_router.post("/connect/portfolios/{portfolio_id}/vote")
 async def vote_portfolio(portfolio_id: str, current_user: dict = Depends(get_current_user)):
-    """Vote for a featured portfolio"""
-    portfolio = await db.portfolio_submissions.find_one({"id": portfolio_id})
+    """Vote for a featured portfolio.
+
+    The vote document and the submission's vote count are written right
+    away (the count is checked by the reconciliation, so it must never lag
+    the votes); the owner's points go through a write-behind buffer and the
+    in-memory leaderboard moves immediately. Points are not reconciled: a
+    hard crash loses the ones not flushed yet, and during a Mongo outage
+    points for owners beyond the buffer cap are dropped (see ViewCounter).
+    """
+    portfolio = portfolio_leaderboard.get(portfolio_id)
+    if portfolio is None:
+        portfolio = await db.portfolio_submissions.find_one({"id": portfolio_id}, {"_id": 0, "user_id": 1})
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     
     if portfolio["user_id"] == current_user["id"]:
         raise HTTPException(status_code=400, detail="You cannot vote for your own portfolio")
     
-    # Check if user already voted for this portfolio
-    existing_vote = await db.votes.find_one({
-        "user_id": current_user["id"],
-        "target_id": portfolio_id,
-        "target_type": "portfolio"
-    })
+    vote_key = {"user_id": current_user["id"], "target_id": portfolio_id, "target_type": "portfolio"}
+    vote = Vote(**vote_key, vote_type="up").dict()
+    on_insert = {k: v for k, v in vote.items() if k not in vote_key}
+    try:
+        # Upsert no índice único: o voto existente (ou um duplo clique simultâneo) é detectado aqui
+        previous = await db.votes.find_one_and_update(
+            vote_key,
+            {"$setOnInsert": on_insert},
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        previous = True
     
-    if existing_vote:
+    if previous is not None:
         raise HTTPException(status_code=400, detail="You have already voted for this portfolio")
     
-    # Create vote
-    vote = Vote(
-        user_id=current_user["id"],
-        target_id=portfolio_id,
-        target_type="portfolio",
-        vote_type="up"
-    )
-    
-    await db.votes.insert_one(vote.dict())
     await db.portfolio_submissions.update_one({"id": portfolio_id}, {"$inc": {"votes": 1}})
-    
+    portfolio_leaderboard.vote(portfolio_id)
     # Award points to portfolio owner
-    await db.users.update_one(
-        {"id": portfolio["user_id"]},
-        {"$inc": {"pc_points": 2}}
-    )
+    portfolio_points.add("users", portfolio["user_id"], amount=2)
     
     return {"message": "Vote recorded successfully"}
 
@@ -930,13 +1428,61 @@ async def get_admin_stats(current_user: dict = Depends(get_current_user)):
         "total_articles": total_articles
     }
 
+@api_router.get("/admin/metrics")
+async def get_admin_metrics(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Access denied. Admin only.")
+    
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_service": password_service.stats(),
+        "activity_tracker": activity_tracker.stats(),
+        "view_counter": view_counter.stats(),
+        "question_similarity": question_similarity.stats(),
+        "timeline": timeline.stats(),
+        "feed_cache": feed_cache.stats(),
+        "like_counter": like_counter.stats(),
+        "suggestions": suggestion_engine.stats(),
+        "portfolio_leaderboard": portfolio_leaderboard.stats(),
+        "portfolio_points": portfolio_points.stats()
+    }
+
+@api_router.post("/admin/reconcile")
+async def start_reconciliation(
+    dry_run: bool = False,
+    checks: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Recompute denormalized counters in the background (``checks``: comma-separated names)."""
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Access denied. Admin only.")
+    
+    only = [name.strip() for name in checks.split(",") if name.strip()] if checks else None
+    known = {check.name for check in reconciler.checks}
+    if only and not set(only) <= known:
+        raise HTTPException(status_code=400, detail=f"Unknown checks. Available: {', '.join(sorted(known))}")
+    
+    if not reconciler.trigger(dry_run=dry_run, only=only):
+        raise HTTPException(status_code=409, detail="Reconciliation already running")
+    return {"message": "Reconciliation started", "dry_run": dry_run}
+
+@api_router.get("/admin/reconcile")
+async def get_reconciliation_report(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Access denied. Admin only.")
+    
+    report = reconciler.last_report
+    if report is None:
+        report = await db.reconciliation_reports.find_one(sort=[("started_at", -1)])
+    return BSONJSONResponse({"running": reconciler.running, "report": report})
+
 @api_router.get("/admin/answers/pending")
 async def get_pending_answers(current_user: dict = Depends(get_current_user)):
     if not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Access denied. Admin only.")
     
     pending_answers = await db.answers.find({"is_validated": False}).to_list(100)
-    return pending_answers
+    return BSONJSONResponse(pending_answers)
 
 @api_router.post("/admin/answers/{answer_id}/validate")
 async def validate_answer(answer_id: str, current_user: dict = Depends(get_current_user)):
@@ -962,6 +1508,7 @@ async def validate_answer(answer_id: str, current_user: dict = Depends(get_curre
         {"id": answer["author_id"]},
         {"$inc": {"pc_points": 10, "pcon_points": 10}}
     )
+    principal_cache.invalidate(answer["author_id"])
     
     return {"message": "Answer validated successfully"}
 
@@ -980,7 +1527,7 @@ async def reject_answer(answer_id: str, current_user: dict = Depends(get_current
     # Update question answer count
     await db.questions.update_one(
         {"id": answer["question_id"]},
-        {"$inc": {"answers_count": -1}}
+        inc_with_hot_score({"answers_count": -1})
     )
     
     return {"message": "Answer rejected and removed"}
@@ -1013,8 +1560,7 @@ async def get_store_items(
         
         items = await db.store_items.find(query).skip(skip).limit(limit).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(items))
+        return BSONJSONResponse(items)
         
     except Exception as e:
         raise HTTPException(
@@ -1039,8 +1585,7 @@ async def get_store_item(item_id: str):
                 detail="Item não encontrado"
             )
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(item))
+        return BSONJSONResponse(item)
         
     except HTTPException:
         raise
@@ -1126,6 +1671,7 @@ async def purchase_item(
                 
                 await db.purchases.insert_one(purchase_data, session=session)
                 await session.commit_transaction()
+        principal_cache.invalidate(current_user["id"])
         
         return {"message": "Compra realizada com sucesso"}
         
@@ -1158,8 +1704,7 @@ async def get_user_inventory(current_user: dict = Depends(get_current_user)):
         
         inventory = await db.user_inventory.aggregate(pipeline).to_list(1000)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(inventory))
+        return BSONJSONResponse(inventory)
         
     except Exception as e:
         raise HTTPException(
@@ -1241,8 +1786,7 @@ async def get_jobs(
         
         jobs = await db.jobs.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(jobs))
+        return BSONJSONResponse(jobs)
         
     except HTTPException:
         raise
@@ -1272,13 +1816,13 @@ async def create_job(
         job_dict["is_active"] = True
         
         result = await db.jobs.insert_one(job_dict)
+        await tag_stats.record("jobs", job_dict.get("skills", []))
         
         # Buscar a vaga criada
         created_job = await db.jobs.find_one({"_id": result.inserted_id})
         created_job["applications_count"] = 0
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_job))
+        return BSONJSONResponse(created_job)
         
     except HTTPException:
         raise
@@ -1426,8 +1970,7 @@ async def get_articles(
         
         articles = await db.articles.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(articles))
+        return BSONJSONResponse(articles)
         
     except HTTPException:
         raise
@@ -1469,6 +2012,7 @@ async def create_article(
             article_dict["published_at"] = datetime.utcnow()
         
         result = await db.articles.insert_one(article_dict)
+        await tag_stats.record("articles", article_dict.get("tags", []))
         
         # Buscar o artigo criado
         created_article = await db.articles.find_one({"_id": result.inserted_id})
@@ -1476,8 +2020,7 @@ async def create_article(
         created_article["author_rank"] = current_user.get("rank")
         created_article["comments_count"] = 0
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_article))
+        return BSONJSONResponse(created_article)
         
     except HTTPException:
         raise
@@ -1565,6 +2108,122 @@ async def upvote_article(
             detail=f"Erro ao votar no artigo: {str(e)}"
         )
 
+# CICLO DE VIDA
+@app.on_event("startup")
+async def create_indexes():
+    await db.users.create_index("id", unique=True)
+    await db.companies.create_index("id", unique=True)
+    await db.companies.create_index("email")
+    await db.questions.create_index(
+        [("title", TEXT), ("tags", TEXT), ("content", TEXT), ("author_username", TEXT)],
+        weights={"title": 10, "tags": 5, "content": 2, "author_username": 1},
+        default_language="portuguese",
+        name="questions_text"
+    )
+    await db.questions.create_index([("created_at", -1), ("id", -1)])
+    await db.questions.create_index([("hot_score", -1), ("id", -1)])
+    await db.questions.create_index("search_terms")
+    # Os upserts de voto dependem deste índice para barrar votos repetidos: sem ele
+    # o servidor não sobe. Duplicatas antigas são removidas antes (dedupe_votes).
+    await run_migration_once("dedupe_votes", dedupe_votes)
+    await db.votes.create_index(
+        [("user_id", 1), ("target_id", 1), ("target_type", 1)],
+        unique=True,
+        name="one_vote_per_user"
+    )
+    await db.answers.create_index([("question_id", 1)] + ANSWER_SORT)
+    await db.votes.create_index([("target_id", 1), ("target_type", 1)])
+    await db.likes.create_index([("target_id", 1), ("target_type", 1)])
+    await db.likes.create_index([("user_id", 1), ("target_id", 1), ("target_type", 1)])
+    await db.comments.create_index([("post_id", 1), ("created_at", 1), ("id", 1)])
+    await db.reconciliation_reports.create_index([("started_at", -1)])
+    await db.posts.create_index("id")
+    await db.portfolio_submissions.create_index("id")
+    await db.portfolio_submissions.create_index([("week_year", 1), ("user_id", 1)])
+    await db.posts.create_index(POST_LIST_SORT)
+    await db.posts.create_index([("author_id", 1)] + POST_LIST_SORT)
+    await timeline.create_indexes()
+    await follow_graph.create_indexes()
+    await user_profiles.create_indexes()
+    await like_counter.create_indexes()
+    await suggestion_engine.create_indexes()
+    await revoked_tokens.create_indexes()
+    await tag_stats.create_indexes()
+
+async def run_migration_once(name: str, migration) -> None:
+    """Run ``migration`` once per database; applied names are kept in db.migrations."""
+    if await db.migrations.find_one({"_id": name}):
+        return
+    await migration()
+    await db.migrations.update_one(
+        {"_id": name},
+        {"$set": {"applied_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def dedupe_votes():
+    """Keep only the oldest vote per (user_id, target_id, target_type)."""
+    duplicates = db.votes.aggregate([
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "target_id": "$target_id", "target_type": "$target_type"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    removed = 0
+    async for group in duplicates:
+        result = await db.votes.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    if removed:
+        print(f"{removed} votos duplicados removidos")
+        # Os contadores contavam as duplicatas: a reconciliação os recalcula
+        reconciler.trigger(only=["question_votes", "answer_votes", "portfolio_votes"])
+
+async def backfill_vote_scores():
+    score = {"$subtract": [{"$ifNull": ["$upvotes", 0]}, {"$ifNull": ["$downvotes", 0]}]}
+    for collection in (db.questions, db.answers):
+        await collection.update_many({"score": {"$exists": False}}, [{"$set": {"score": score}}])
+
+async def backfill_hot_scores():
+    await db.questions.update_many(
+        {"hot_score": {"$exists": False}, "created_at": {"$type": "date"}},
+        REFRESH_HOT_SCORE
+    )
+
+@app.on_event("startup")
+async def run_migrations():
+    await run_migration_once("vote_score_field", backfill_vote_scores)
+    await run_migration_once("question_hot_score", backfill_hot_scores)
+    await run_migration_once("question_search_terms", lambda: backfill_search_terms(db.questions))
+    await run_migration_once("follow_edges", lambda: migrate_follow_arrays(db))
+    await run_migration_once("timelines_seed", timeline.seed)
+    await run_migration_once("user_profiles_split", user_profiles.migrate)
+    await run_migration_once("tag_stats", lambda: tag_stats.rebuild(db))
+
+@app.on_event("startup")
+async def start_background_writers():
+    activity_tracker.start()
+    view_counter.start()
+    question_similarity.start(db.questions)
+    reconciler.start()
+    suggestion_engine.start()
+    portfolio_points.start()
+    await portfolio_leaderboard.start()
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    await activity_tracker.stop()
+    await view_counter.stop()
+    await question_similarity.stop()
+    await reconciler.stop()
+    await suggestion_engine.stop()
+    await portfolio_leaderboard.stop()
+    await portfolio_points.stop()
+    await timeline.drain()
+    password_service.shutdown()
+
 # Include API router
 app.include_router(api_router)
 
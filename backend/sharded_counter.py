@@ -0,0 +1,115 @@
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+
+class ShardedCounter:
+    """Counter field that switches to K shard documents when it gets hot.
+
+    Normally ``increment`` is a plain ``$inc`` on the target document. The
+    write rate per document is tracked over ``window`` seconds; once it goes
+    above ``hot_rate`` writes/second the document is flagged
+    ``<field>_sharded`` and from then on every increment goes to one of
+    ``shards`` random documents in ``<target>_<field>_shards``, so concurrent
+    writers no longer queue on the same document. The field on the target
+    keeps the value it had when it was sharded; reads add the sum of the
+    shards, which is cached for ``read_ttl`` seconds.
+
+    The flag lives in the target document, so every worker process switches
+    as soon as it reads the document again. ``shards=0`` disables sharding.
+    """
+
+    def __init__(self, db, target: str = "posts", field: str = "likes", shards: int = 16,
+                 hot_rate: float = 20.0, window: float = 10.0, read_ttl: float = 2.0,
+                 max_tracked: int = 10000):
+        self.target = db[target]
+        self.shard_docs = db[f"{target}_{field}_shards"]
+        self.field = field
+        self.flag = f"{field}_sharded"
+        self.shards = shards
+        self.hot_rate = hot_rate
+        self.window = window
+        self.read_ttl = read_ttl
+        self.max_tracked = max_tracked
+        self._rates: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._sums: Dict[str, Tuple[float, int]] = {}
+        self.promoted = 0
+        self.sharded_writes = 0
+        self.direct_writes = 0
+
+    def is_sharded(self, doc: dict) -> bool:
+        return bool(doc.get(self.flag))
+
+    def _is_hot(self, target_id: str) -> bool:
+        now = time.monotonic()
+        started, count = self._rates.pop(target_id, (now, 0))
+        if now - started > self.window:
+            started, count = now, 0
+        count += 1
+        self._rates[target_id] = (started, count)
+        while len(self._rates) > self.max_tracked:
+            self._rates.popitem(last=False)
+        return count > self.hot_rate * self.window
+
+    async def increment(self, doc: dict, amount: int = 1) -> bool:
+        """Apply ``amount`` to ``doc``'s counter; True when it went to a shard."""
+        target_id = doc["id"]
+        if self.is_sharded(doc):
+            # Mesmo com sharding desligado depois, posts já marcados continuam nos shards
+            shard = random.randrange(max(self.shards, 1))
+            await self.shard_docs.update_one(
+                {"_id": f"{target_id}:{shard}"},
+                {"$inc": {"count": amount}, "$setOnInsert": {"target_id": target_id}},
+                upsert=True
+            )
+            self._sums.pop(target_id, None)
+            self.sharded_writes += 1
+            return True
+
+        update = {"$inc": {self.field: amount}}
+        if self.shards > 0 and self._is_hot(target_id):
+            update["$set"] = {self.flag: True}
+            self._rates.pop(target_id, None)
+            self.promoted += 1
+        await self.target.update_one({"id": target_id}, update)
+        self.direct_writes += 1
+        return False
+
+    async def apply(self, docs: List[dict]) -> List[dict]:
+        """Replace the counter of sharded docs in a page by base + sum of shards."""
+        sharded = [doc for doc in docs if self.is_sharded(doc) and "id" in doc]
+        if not sharded:
+            return docs
+
+        now = time.monotonic()
+        stale = [doc["id"] for doc in sharded if self._sums.get(doc["id"], (0, 0))[0] <= now]
+        if stale:
+            if len(self._sums) > self.max_tracked:
+                self._sums = {tid: entry for tid, entry in self._sums.items() if entry[0] > now}
+            totals = {tid: 0 for tid in stale}
+            async for row in self.shard_docs.aggregate([
+                {"$match": {"target_id": {"$in": stale}}},
+                {"$group": {"_id": "$target_id", "count": {"$sum": "$count"}}},
+            ]):
+                totals[row["_id"]] = row["count"]
+            for target_id, total in totals.items():
+                self._sums[target_id] = (now + self.read_ttl, total)
+
+        for doc in sharded:
+            if self.field in doc:
+                doc[self.field] = doc[self.field] + self._sums[doc["id"]][1]
+        return docs
+
+    async def create_indexes(self) -> None:
+        await self.shard_docs.create_index("target_id")
+
+    def stats(self) -> dict:
+        return {
+            "shards": self.shards,
+            "hot_rate_per_second": self.hot_rate,
+            "promoted": self.promoted,
+            "sharded_writes": self.sharded_writes,
+            "direct_writes": self.direct_writes,
+            "tracked": len(self._rates),
+        }
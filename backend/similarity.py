@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import multiprocessing
+import re
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # limiar efetivo do LSH ~ (1/16)^(1/4) = 0.5 de Jaccard
+MAX_CONTENT_CHARS = 2000
+REBUILD_BATCH_SIZE = 500
+
+# One SHAKE-128 digest per feature yields all NUM_PERM 32-bit hash values at
+# once; unlike hash(), it is stable across processes and restarts
+_UNPACK = struct.Struct(f"<{NUM_PERM}I").unpack
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "que", "se", "como", "ao", "é",
+    "the", "an", "of", "to", "in", "on", "for", "and", "or", "is", "how", "what", "with",
+}
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str) -> Set[str]:
+    """Word unigrams and bigrams of ``text``, minus stopwords."""
+    words = [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+    features = set(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return features
+
+
+def signature(features: Iterable[str]) -> Optional[Signature]:
+    rows = [_UNPACK(hashlib.shake_128(feature.encode()).digest(NUM_PERM * 4)) for feature in features]
+    if not rows:
+        return None
+    if len(rows) == 1:
+        return rows[0]
+    return tuple(map(min, *rows))
+
+
+def question_signatures(title: str, content: str = "") -> Tuple[Optional[Signature], Optional[Signature]]:
+    """(title signature, title + content signature) for one question."""
+    title_sig = signature(shingles(title or ""))
+    content_sig = signature(shingles((content or "")[:MAX_CONTENT_CHARS]))
+    if title_sig is None or content_sig is None:
+        return title_sig, title_sig or content_sig
+    # MinHash of a union is the element-wise min of the two signatures
+    return title_sig, tuple(map(min, title_sig, content_sig))
+
+
+def _signature_batch(docs: List[Tuple[str, str, str]]) -> List[tuple]:
+    # Runs in the rebuild pool
+    return [(qid, title, *question_signatures(title, content)) for qid, title, content in docs]
+
+
+def estimated_jaccard(a: Signature, b: Signature) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures: one bucket dict per band."""
+
+    def __init__(self):
+        self._tables: List[Dict[Signature, Set[str]]] = [{} for _ in range(BANDS)]
+        self._signatures: Dict[str, Signature] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _bands(self, sig: Signature):
+        for band in range(BANDS):
+            yield band, sig[band * ROWS:(band + 1) * ROWS]
+
+    def add(self, key: str, sig: Optional[Signature]) -> None:
+        if sig is None or key in self._signatures:
+            return
+        self._signatures[key] = sig
+        for band, bucket in self._bands(sig):
+            self._tables[band].setdefault(bucket, set()).add(key)
+
+    def query(self, sig: Optional[Signature], threshold: float) -> List[Tuple[str, float]]:
+        if sig is None:
+            return []
+        candidates = set()
+        for band, bucket in self._bands(sig):
+            candidates.update(self._tables[band].get(bucket, ()))
+        scored = [(key, estimated_jaccard(sig, self._signatures[key])) for key in candidates]
+        return [(key, score) for key, score in scored if score >= threshold]
+
+
+class QuestionSimilarity:
+    """In-process near-duplicate index over question titles and content.
+
+    Two LSH indexes are kept: title-only (for ``/questions/similar?title=``)
+    and title + content (for the duplicate warning on create). A lookup hashes
+    the query once and only touches the documents sharing a band bucket, so
+    its cost does not grow with the corpus. New questions are added as they
+    are inserted; the full rebuild at startup computes signatures in a spawn
+    process pool and swaps the indexes in when done.
+    """
+
+    def __init__(self, threshold: float = 0.5, workers: int = 2):
+        self.threshold = threshold
+        self.workers = workers
+        self._title = LSHIndex()
+        self._full = LSHIndex()
+        self._titles: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._added_during_rebuild: Optional[List[tuple]] = None
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+        self.rebuild_seconds: Optional[float] = None
+
+    def _insert(self, question_id: str, title: str, title_sig, full_sig) -> None:
+        self._titles[question_id] = title
+        self._title.add(question_id, title_sig)
+        self._full.add(question_id, full_sig)
+
+    def add(self, question_id: str, title: str, content: str = "") -> None:
+        entry = (question_id, title, *question_signatures(title, content))
+        self._insert(*entry)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append(entry)
+
+    def similar(self, title: str, content: str = "", limit: int = 5,
+                threshold: Optional[float] = None) -> List[dict]:
+        started = time.perf_counter()
+        threshold = self.threshold if threshold is None else threshold
+        title_sig, full_sig = question_signatures(title, content)
+        if content:
+            matches = self._full.query(full_sig, threshold)
+        else:
+            matches = self._title.query(title_sig, threshold)
+        matches.sort(key=lambda match: match[1], reverse=True)
+
+        self.lookups += 1
+        self.lookup_seconds += time.perf_counter() - started
+        return [
+            {"id": qid, "title": self._titles.get(qid, ""), "similarity": round(score, 3)}
+            for qid, score in matches[:limit]
+        ]
+
+    async def rebuild(self, collection) -> None:
+        started = time.perf_counter()
+        self._added_during_rebuild = []
+        title_index, full_index, titles = LSHIndex(), LSHIndex(), {}
+        loop = asyncio.get_running_loop()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures, batch = [], []
+                cursor = collection.find({}, {"_id": 0, "id": 1, "title": 1, "content": 1})
+                async for doc in cursor:
+                    batch.append((doc["id"], doc.get("title", ""), doc.get("content", "")))
+                    if len(batch) >= REBUILD_BATCH_SIZE:
+                        futures.append(loop.run_in_executor(executor, _signature_batch, batch))
+                        batch = []
+                if batch:
+                    futures.append(loop.run_in_executor(executor, _signature_batch, batch))
+
+                for entries in await asyncio.gather(*futures):
+                    for qid, title, title_sig, full_sig in entries:
+                        titles[qid] = title
+                        title_index.add(qid, title_sig)
+                        full_index.add(qid, full_sig)
+
+            for qid, title, title_sig, full_sig in self._added_during_rebuild:
+                titles[qid] = title
+                title_index.add(qid, title_sig)
+                full_index.add(qid, full_sig)
+            self._title, self._full, self._titles = title_index, full_index, titles
+            self.rebuild_seconds = time.perf_counter() - started
+        finally:
+            self._added_during_rebuild = None
+
+    async def _rebuild_in_background(self, collection) -> None:
+        try:
+            await self.rebuild(collection)
+        except Exception as e:
+            print(f"Erro ao construir índice de similaridade: {str(e)}")
+
+    def start(self, collection) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._rebuild_in_background(collection))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "indexed": len(self._title),
+            "threshold": self.threshold,
+            "rebuilding": self._added_during_rebuild is not None,
+            "rebuild_seconds": round(self.rebuild_seconds, 3) if self.rebuild_seconds is not None else None,
+            "lookups": self.lookups,
+            "lookup_ms_avg": round(self.lookup_seconds / self.lookups * 1000, 4) if self.lookups else 0.0,
+        }
@@ -3,10 +3,9 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from bson import ObjectId
-import json
-from bson import json_util
 
-from server import get_current_user, db
+from responses import BSONJSONResponse
+from server import get_current_user, db, principal_cache
 
 store_router = APIRouter(prefix="/api/store", tags=["store"])
 
@@ -81,8 +80,7 @@ async def get_store_items(
         
         items = await db.store_items.find(query).skip(skip).limit(limit).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(items))
+        return BSONJSONResponse(items)
         
     except Exception as e:
         raise HTTPException(
@@ -107,8 +105,7 @@ async def get_store_item(item_id: str):
                 detail="Item não encontrado"
             )
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(item))
+        return BSONJSONResponse(item)
         
     except HTTPException:
         raise
@@ -230,13 +227,13 @@ async def purchase_item(
                     await apply_item_effects(current_user["_id"], item["effects"], session)
                 
                 await session.commit_transaction()
+        principal_cache.invalidate(current_user["id"])
         
         # Buscar dados completos para resposta
         purchase = await db.purchases.find_one({"_id": purchase_result.inserted_id})
         purchase["item"] = item
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(purchase))
+        return BSONJSONResponse(purchase)
         
     except HTTPException:
         raise
@@ -267,8 +264,7 @@ async def get_user_inventory(current_user: dict = Depends(get_current_user)):
         
         inventory = await db.user_inventory.aggregate(pipeline).to_list(1000)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(inventory))
+        return BSONJSONResponse(inventory)
         
     except Exception as e:
         raise HTTPException(
@@ -303,8 +299,7 @@ async def get_purchase_history(
         
         purchases = await db.purchases.aggregate(pipeline).to_list(limit)
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(purchases))
+        return BSONJSONResponse(purchases)
         
     except Exception as e:
         raise HTTPException(
@@ -470,8 +465,7 @@ async def create_store_item(
         # Buscar o item criado
         created_item = await db.store_items.find_one({"_id": result.inserted_id})
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(created_item))
+        return BSONJSONResponse(created_item)
         
     except HTTPException:
         raise
@@ -518,8 +512,7 @@ async def update_store_item(
         # Buscar o item atualizado
         updated_item = await db.store_items.find_one({"_id": ObjectId(item_id)})
         
-        # Converter para JSON serializável
-        return json.loads(json_util.dumps(updated_item))
+        return BSONJSONResponse(updated_item)
         
     except HTTPException:
         raise
@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import math
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from pymongo import DESCENDING, ReplaceOne
+
+from follows import FollowGraph, user_cards
+from leases import JobLease
+from tag_stats import normalize_tags
+
+MUTUAL_WEIGHT = 3.0
+SKILL_WEIGHT = 1.0
+TAG_WEIGHT = 1.5
+# Skills/tags compartilhados por mais gente que isso não distinguem ninguém
+MAX_POSTING = 2000
+MAX_REASONS = 3
+
+
+def _inverted(sets: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+    index = defaultdict(list)
+    for owner, values in sets.items():
+        for value in values:
+            index[value].append(owner)
+    return index
+
+
+def compute_suggestions(
+    users: Iterable[str],
+    following: Dict[str, Set[str]],
+    skills: Dict[str, Set[str]],
+    tags: Dict[str, Set[str]],
+    top_k: int = 20,
+) -> Dict[str, List[dict]]:
+    """Top-``top_k`` accounts to follow for each of ``users``.
+
+    Candidates come from three sparse intersections, each walked from the
+    user outwards so the cost depends on the neighbourhood, not on the
+    number of users: followees of followees (friends-of-friends), users
+    sharing a skill and authors sharing a question tag (through inverted
+    indexes, weighted by rarity). Runs in the suggestion worker process.
+    """
+    skill_index = _inverted(skills)
+    tag_index = _inverted(tags)
+    results = {}
+
+    for user in users:
+        followed = following.get(user, set())
+        scores: Dict[str, float] = defaultdict(float)
+        mutual: Dict[str, int] = defaultdict(int)
+        shared_skills: Dict[str, List[str]] = defaultdict(list)
+        shared_tags: Dict[str, List[str]] = defaultdict(list)
+
+        for friend in followed:
+            for candidate in following.get(friend, ()):
+                mutual[candidate] += 1
+                scores[candidate] += MUTUAL_WEIGHT
+
+        for index, values, shared, weight in (
+            (skill_index, skills.get(user, ()), shared_skills, SKILL_WEIGHT),
+            (tag_index, tags.get(user, ()), shared_tags, TAG_WEIGHT),
+        ):
+            for value in values:
+                posting = index.get(value, ())
+                if len(posting) > MAX_POSTING:
+                    continue
+                rarity = weight / math.log(len(posting) + 1, 2)
+                for candidate in posting:
+                    scores[candidate] += rarity
+                    shared[candidate].append(value)
+
+        scores.pop(user, None)
+        for already in followed:
+            scores.pop(already, None)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        results[user] = [
+            {
+                "user_id": candidate,
+                "score": round(score, 3),
+                "mutual_follows": mutual.get(candidate, 0),
+                "shared_skills": sorted(shared_skills.get(candidate, []))[:MAX_REASONS],
+                "shared_tags": sorted(shared_tags.get(candidate, []))[:MAX_REASONS],
+            }
+            for candidate, score in best
+        ]
+    return results
+
+
+class SuggestionEngine:
+    """Periodic batch computation of "who to follow" suggestions.
+
+    Every ``interval`` seconds the follow graph, profile skills and question
+    tags are loaded once and ``compute_suggestions`` runs for every user in a
+    spawn worker process, so the event loop keeps serving requests. Results
+    are stored in ``user_suggestions`` (one document per user). Users without
+    a stored result, or with one older than ``max_age``, get theirs computed
+    on demand from their own neighbourhood only.
+
+    The batch is guarded by a JobLease held for ``interval`` seconds, so with
+    several API workers only one of them loads the data and spawns the pool
+    per period.
+    """
+
+    def __init__(self, db, top_k: int = 20, interval: float = 21600, max_age: float = 86400):
+        self.db = db
+        self.graph = FollowGraph(db)
+        self.lease = JobLease(db.job_leases, "user_suggestions")
+        self.top_k = top_k
+        self.interval = interval
+        self.max_age = max_age
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock = asyncio.Lock()
+        self.last_run_seconds: Optional[float] = None
+        self.last_run_users = 0
+        self.on_demand = 0
+        self.skipped_runs = 0
+
+    async def _load_following(self, query: Optional[dict] = None, limit: int = 0) -> Dict[str, Set[str]]:
+        following = defaultdict(set)
+        cursor = self.db.follows.find(query or {}, {"_id": 0, "follower_id": 1, "followee_id": 1}).limit(limit)
+        async for edge in cursor:
+            following[edge["follower_id"]].add(edge["followee_id"])
+        return following
+
+    async def _load_skills(self, query: Optional[dict] = None, limit: int = 0,
+                           raw: Optional[Set[str]] = None) -> Dict[str, Set[str]]:
+        """Normalized skills per user; ``raw`` collects the values as stored."""
+        skills = {}
+        async for profile in self.db.user_profiles.find(query or {}, {"_id": 0, "user_id": 1, "skills": 1}).limit(limit):
+            if raw is not None:
+                raw.update(value for value in profile.get("skills") or [] if isinstance(value, str))
+            values = set(normalize_tags(profile.get("skills")))
+            if values:
+                skills[profile["user_id"]] = values
+        return skills
+
+    async def _load_tags(self, match: Optional[dict] = None, limit: int = 0,
+                         raw: Optional[Set[str]] = None) -> Dict[str, Set[str]]:
+        """Normalized question tags per author; ``raw`` collects the values as stored."""
+        pipeline = [
+            {"$match": match or {}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$author_id", "tags": {"$addToSet": "$tags"}}},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        tags = {}
+        async for row in self.db.questions.aggregate(pipeline):
+            if raw is not None:
+                raw.update(value for value in row["tags"] if isinstance(value, str))
+            values = set(normalize_tags(row["tags"]))
+            if values:
+                tags[row["_id"]] = values
+        return tags
+
+    async def _store(self, results: Dict[str, List[dict]], batch_size: int = 1000) -> None:
+        now = datetime.utcnow()
+        ops = [
+            ReplaceOne({"user_id": user_id}, {"user_id": user_id, "suggestions": items, "computed_at": now}, upsert=True)
+            for user_id, items in results.items()
+        ]
+        for start in range(0, len(ops), batch_size):
+            await self.db.user_suggestions.bulk_write(ops[start:start + batch_size], ordered=False)
+
+    async def run(self) -> int:
+        """Recompute suggestions for every user; returns how many were stored."""
+        async with self._run_lock:
+            started = time.perf_counter()
+            following = await self._load_following()
+            skills = await self._load_skills()
+            tags = await self._load_tags()
+            users = [doc["id"] async for doc in self.db.users.find({}, {"_id": 0, "id": 1})]
+
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = await loop.run_in_executor(
+                    executor, compute_suggestions, users, dict(following), skills, tags, self.top_k
+                )
+            await self._store(results)
+
+            self.last_run_seconds = time.perf_counter() - started
+            self.last_run_users = len(results)
+            print(f"Sugestões recalculadas para {len(results)} usuários em {self.last_run_seconds:.1f}s")
+            return len(results)
+
+    async def compute_for(self, user_id: str, neighbourhood_limit: int = 5000) -> List[dict]:
+        """On-demand suggestions for one user, loading only their neighbourhood."""
+        following = await self._load_following({"follower_id": user_id})
+        followed = list(following.get(user_id, ()))
+        if followed:
+            following.update(await self._load_following({"follower_id": {"$in": followed}}, neighbourhood_limit))
+
+        # Os valores são gravados como digitados ("Python"); a busca usa os originais
+        # e os normalizados, e a comparação no score é feita já normalizada
+        raw_skills, raw_tags = set(), set()
+        skills = await self._load_skills({"user_id": user_id}, raw=raw_skills)
+        if skills:
+            skills.update(await self._load_skills(
+                {"skills": {"$in": list(raw_skills | skills[user_id])}}, neighbourhood_limit
+            ))
+        tags = await self._load_tags({"author_id": user_id}, raw=raw_tags)
+        if tags:
+            tags.update(await self._load_tags(
+                {"tags": {"$in": list(raw_tags | tags[user_id])}}, neighbourhood_limit
+            ))
+
+        items = compute_suggestions([user_id], following, skills, tags, self.top_k)[user_id]
+        if not items:
+            # Usuário novo sem sinal nenhum: os perfis mais seguidos
+            popular = await self.db.users.find(
+                {"id": {"$ne": user_id}}, {"_id": 0, "id": 1}
+            ).sort("followers_count", DESCENDING).limit(self.top_k).to_list(self.top_k)
+            items = [
+                {"user_id": doc["id"], "score": 0.0, "mutual_follows": 0, "shared_skills": [], "shared_tags": []}
+                for doc in popular if doc["id"] not in following.get(user_id, ())
+            ]
+        await self._store({user_id: items})
+        self.on_demand += 1
+        return items
+
+    async def get(self, user_id: str, limit: int = 10) -> List[dict]:
+        """Stored suggestions with user cards, minus accounts followed since they were computed."""
+        doc = await self.db.user_suggestions.find_one({"user_id": user_id})
+        if doc is None or doc["computed_at"] < datetime.utcnow() - timedelta(seconds=self.max_age):
+            items = await self.compute_for(user_id)
+        else:
+            items = doc["suggestions"]
+
+        followed = await self.graph.followed_among(user_id, [item["user_id"] for item in items])
+        items = [item for item in items if item["user_id"] not in followed][:limit]
+        by_id = await user_cards(self.db, (item["user_id"] for item in items), {"is_banned": {"$ne": True}})
+        return [{**by_id[item["user_id"]], **item} for item in items if item["user_id"] in by_id]
+
+    async def _run_safely(self) -> None:
+        try:
+            if not await self.lease.acquire(self.interval):
+                # Outro worker já está recalculando (ou recalculou neste período)
+                self.skipped_runs += 1
+                return
+            await self.run()
+        except Exception as e:
+            print(f"Erro ao recalcular sugestões: {str(e)}")
+            await self.lease.release()
+
+    async def _periodic(self) -> None:
+        if not await self.db.user_suggestions.count_documents({}, limit=1):
+            await self._run_safely()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._run_safely()
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._periodic())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def create_indexes(self) -> None:
+        await self.db.user_suggestions.create_index("user_id", unique=True)
+        await self.db.job_leases.create_index("expires_at", expireAfterSeconds=0)
+        await self.db.user_profiles.create_index("skills")
+        await self.db.questions.create_index([("author_id", 1), ("tags", 1)])
+        await self.db.users.create_index([("followers_count", DESCENDING)])
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._run_lock.locked(),
+            "last_run_seconds": round(self.last_run_seconds, 2) if self.last_run_seconds is not None else None,
+            "last_run_users": self.last_run_users,
+            "on_demand": self.on_demand,
+            "skipped_runs": self.skipped_runs,
+        }
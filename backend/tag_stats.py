@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Iterable, List
+
+from pymongo import DESCENDING, ReplaceOne, UpdateOne
+
+MAX_TAG_LENGTH = 50
+# Prefixo curto casa muitas tags: só as primeiras N (ordem de _id) são ordenadas por uso
+MAX_PREFIX_CANDIDATES = 2000
+# (coleção, campo, nome em by_collection) reconstruídos por rebuild()
+TAG_SOURCES = [
+    ("questions", "tags", "questions"),
+    ("posts", "tags", "posts"),
+    ("articles", "tags", "articles"),
+    ("jobs", "skills", "jobs"),
+]
+
+
+def normalize_tags(tags: Iterable) -> List[str]:
+    """Lower-case, trimmed, de-duplicated tags; blanks and oversized values dropped."""
+    seen = []
+    for tag in tags or []:
+        if not isinstance(tag, str):
+            continue
+        tag = tag.strip().lower()
+        if tag and len(tag) <= MAX_TAG_LENGTH and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+class TagStats:
+    """Read model of tag usage across questions, posts, articles and job skills.
+
+    One document per tag::
+
+        {_id: "python", count: 42, last_used: ..., by_collection: {questions: 30, posts: 12}}
+
+    Creation handlers call ``record`` so the counts are maintained
+    incrementally, and ``rebuild`` recomputes them from the source
+    collections (run once for existing data). Top-N reads are served by the
+    ``(count, _id)`` index; a prefix read takes the first
+    ``MAX_PREFIX_CANDIDATES`` tags of the ``_id`` range and ranks them by
+    count in memory, so a very short prefix may miss popular tags that sort
+    after that cut.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def record(self, source: str, tags: Iterable) -> None:
+        tags = normalize_tags(tags)
+        if not tags:
+            return
+        now = datetime.utcnow()
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": tag},
+                {"$inc": {"count": 1, f"by_collection.{source}": 1}, "$max": {"last_used": now}},
+                upsert=True
+            )
+            for tag in tags
+        ], ordered=False)
+
+    async def top(self, limit: int = 20, prefix: str = "") -> List[dict]:
+        prefix = prefix.strip().lower()
+        if prefix:
+            candidates = await self.collection.find(
+                {"_id": {"$gte": prefix, "$lt": prefix + "\uffff"}}, {"rebuilt_at": 0}
+            ).sort("_id", 1).limit(MAX_PREFIX_CANDIDATES).to_list(MAX_PREFIX_CANDIDATES)
+            docs = sorted(candidates, key=lambda doc: -doc.get("count", 0))[:limit]
+        else:
+            docs = await self.collection.find({}, {"rebuilt_at": 0}).sort([("count", DESCENDING), ("_id", 1)]).limit(limit).to_list(limit)
+        return [{"tag": doc.pop("_id"), **doc} for doc in docs]
+
+    async def rebuild(self, db, batch_size: int = 1000) -> int:
+        """Recompute every tag document from the source collections; returns tags written.
+
+        Each source is grouped server-side into a scratch collection (tags
+        trimmed, lower-cased and de-duplicated per document, as ``record``
+        does). The keys are then passed through ``normalize_tags``, because
+        ``$toLower`` only folds ASCII, and written back with one replace per tag.
+        """
+        started = datetime.utcnow()
+        scratch = db[f"{self.collection.name}_rebuild"]
+        await scratch.drop()
+        for collection, field, name in TAG_SOURCES:
+            values = {"$filter": {
+                "input": {"$cond": [{"$isArray": f"${field}"}, f"${field}", []]},
+                "cond": {"$eq": [{"$type": "$$this"}, "string"]},
+            }}
+            await db[collection].aggregate([
+                {"$project": {"_id": 0, "created_at": 1, "tag": {"$setUnion": [
+                    {"$map": {"input": values, "in": {"$toLower": {"$trim": {"input": "$$this"}}}}}
+                ]}}},
+                {"$unwind": "$tag"},
+                {"$match": {"tag": {"$ne": ""}}},
+                {"$group": {"_id": "$tag", "count": {"$sum": 1}, "last_used": {"$max": "$created_at"}}},
+                {"$project": {"count": 1, "last_used": 1, "by_collection": {name: "$count"}}},
+                {"$merge": {
+                    "into": scratch.name,
+                    "on": "_id",
+                    "whenMatched": [{"$set": {
+                        "count": {"$add": ["$count", "$$new.count"]},
+                        "last_used": {"$max": ["$last_used", "$$new.last_used"]},
+                        "by_collection": {"$mergeObjects": ["$by_collection", "$$new.by_collection"]},
+                    }}],
+                    "whenNotMatched": "insert",
+                }},
+            ], allowDiskUse=True).to_list(None)
+
+        tags = {}
+        async for doc in scratch.find():
+            normalized = normalize_tags([doc["_id"]])
+            if not normalized:
+                continue
+            entry = tags.setdefault(normalized[0], {"count": 0, "last_used": None, "by_collection": {}})
+            entry["count"] += doc["count"]
+            if doc.get("last_used") and (entry["last_used"] is None or doc["last_used"] > entry["last_used"]):
+                entry["last_used"] = doc["last_used"]
+            for source, count in doc["by_collection"].items():
+                entry["by_collection"][source] = entry["by_collection"].get(source, 0) + count
+
+        rebuilt_at = datetime.utcnow()
+        ops = [ReplaceOne({"_id": tag}, {**entry, "rebuilt_at": rebuilt_at}, upsert=True) for tag, entry in tags.items()]
+        for start in range(0, len(ops), batch_size):
+            await self.collection.bulk_write(ops[start:start + batch_size], ordered=False)
+        # Tags que não aparecem mais em nenhum documento; as usadas por record() durante a reconstrução ficam
+        await self.collection.delete_many({"$or": [
+            {"rebuilt_at": {"$lt": rebuilt_at}},
+            {"rebuilt_at": {"$exists": False}, "last_used": {"$lt": started}},
+        ]})
+        await scratch.drop()
+        return len(tags)
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index([("count", DESCENDING), ("_id", 1)])
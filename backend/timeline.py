@@ -0,0 +1,291 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from pymongo import DESCENDING, InsertOne
+from pymongo.errors import BulkWriteError
+
+from feed_cache import FeedCache
+from follows import FollowGraph
+from pagination import apply_cursor, next_cursor
+
+TIMELINE_SORT = [("created_at", DESCENDING), ("post_id", DESCENDING)]
+FEED_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+DUPLICATE_KEY = 11000
+
+
+class TimelineFanout:
+    """Fan-out-on-write home timelines for Connect.
+
+    Every post is copied, as a small ``{owner_id, post_id, author_id,
+    created_at}`` entry, into the timeline of its author and of each
+    follower, so reading a home feed is one range over the
+    (owner_id, created_at, post_id) index instead of an ``$in`` over the
+    whole follow list. Fan-out runs in background tasks and writes
+    ``batch_size`` entries per unordered ``bulk_write``.
+
+    Authors with more than ``max_followers`` followers are not fanned out
+    (one post would mean millions of writes); they are flagged with
+    ``fanout_on_read`` and their posts are merged into the feed at read time
+    from the (author_id, created_at) posts index. The flag is re-checked
+    when the author posts again: once they are back under ``max_followers``
+    it is cleared and their followers' timelines are backfilled, so the
+    read-time merge only lasts until the next post.
+
+    ``seed`` fills the timelines from existing posts and follow edges, for
+    data created before fan-out existed.
+
+    With a ``cache`` (see feed_cache.py), active readers' feeds and post
+    documents are served from memory and kept current by the fan-out.
+    """
+
+    def __init__(self, db, batch_size: int = 1000, max_followers: int = 5000,
+                 celebrity_ttl: float = 60.0, backfill: int = 20, cache: Optional[FeedCache] = None):
+        self.db = db
+        self.graph = FollowGraph(db)
+        self.cache = cache
+        self.timelines = db.timelines
+        self.batch_size = batch_size
+        self.max_followers = max_followers
+        self.celebrity_ttl = celebrity_ttl
+        self.backfill = backfill
+        self._tasks: Set[asyncio.Task] = set()
+        self._celebrities: Set[str] = set()
+        self._celebrities_loaded_at: Optional[float] = None
+        self.fanouts = 0
+        self.entries_written = 0
+        self.skipped_celebrity = 0
+        self.errors = 0
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _insert(self, entries: List[dict]) -> None:
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            try:
+                await self.timelines.bulk_write([InsertOne(entry) for entry in batch], ordered=False)
+                self.entries_written += len(batch)
+            except BulkWriteError as e:
+                # Entradas já existentes (retry/backfill repetido) são ignoradas
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                    raise
+                self.entries_written += e.details.get("nInserted", 0)
+
+    async def _is_celebrity(self, author_id: str) -> bool:
+        return await self.db.users.count_documents(
+            {"id": author_id, "followers_count": {"$gt": self.max_followers}}, limit=1
+        ) > 0
+
+    async def _fan_out(self, post: dict) -> None:
+        # Mongo guarda milissegundos; a chave em memória precisa bater com a lida do banco
+        created_at = post["created_at"].replace(microsecond=post["created_at"].microsecond // 1000 * 1000)
+        entry = {
+            "post_id": post["id"],
+            "author_id": post["author_id"],
+            "created_at": created_at,
+        }
+        key = (created_at, post["id"])
+        try:
+            await self._insert([{"owner_id": post["author_id"], **entry}])
+            if self.cache:
+                self.cache.push([post["author_id"]], key)
+            if await self._is_celebrity(post["author_id"]):
+                self.skipped_celebrity += 1
+                if self.cache:
+                    self.cache.push_from_author(post["author_id"], key)
+                if post["author_id"] not in self._celebrities:
+                    self._celebrities.add(post["author_id"])
+                    await self.db.users.update_one({"id": post["author_id"]}, {"$set": {"fanout_on_read": True}})
+                return
+            if post["author_id"] in await self.celebrities():
+                await self._demote(post["author_id"])
+            async for followers in self.graph.follower_batches(post["author_id"], self.batch_size):
+                await self._insert([{"owner_id": follower_id, **entry} for follower_id in followers])
+                if self.cache:
+                    self.cache.push(followers, key)
+            self.fanouts += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Erro no fan-out do post {post['id']}: {str(e)}")
+
+    def publish(self, post: dict) -> None:
+        """Fan ``post`` out to its author's and followers' timelines in the background."""
+        self._spawn(self._fan_out(post))
+
+    async def _latest_posts(self, author_id: str) -> List[dict]:
+        return await self.db.posts.find(
+            {"author_id": author_id}, {"_id": 0, "id": 1, "author_id": 1, "created_at": 1}
+        ).sort("created_at", DESCENDING).limit(self.backfill).to_list(self.backfill)
+
+    @staticmethod
+    def _entries(owner_id: str, posts: List[dict]) -> List[dict]:
+        return [
+            {"owner_id": owner_id, "post_id": p["id"], "author_id": p["author_id"], "created_at": p["created_at"]}
+            for p in posts
+        ]
+
+    async def _backfill(self, follower_id: str, followee_id: str, posts: Optional[List[dict]] = None) -> None:
+        try:
+            if posts is None:
+                posts = await self._latest_posts(followee_id)
+            await self._insert(self._entries(follower_id, posts))
+        except Exception as e:
+            self.errors += 1
+            print(f"Erro ao preencher timeline de {follower_id}: {str(e)}")
+
+    async def _demote(self, author_id: str) -> None:
+        """Author fell back under max_followers: back to fan-out on write."""
+        await self.db.users.update_one({"id": author_id}, {"$unset": {"fanout_on_read": ""}})
+        self._celebrities.discard(author_id)
+        posts = await self._latest_posts(author_id)
+        async for followers in self.graph.follower_batches(author_id, self.batch_size):
+            await self._insert([entry for follower_id in followers for entry in self._entries(follower_id, posts)])
+            if self.cache:
+                self.cache.invalidate_user(*followers)
+
+    async def seed(self) -> int:
+        """Fill timelines from existing posts and follow edges; returns entries written.
+
+        Every author gets their own latest ``backfill`` posts and every
+        follower those of each followee, like ``followed`` does for a new
+        edge. Authors over ``max_followers`` are flagged ``fanout_on_read``
+        instead. Edges are walked by followee so each author's posts are read
+        once; existing entries are skipped, so it is safe to re-run.
+        """
+        written = self.entries_written
+        celebrities = {
+            doc["id"] async for doc in self.db.users.find(
+                {"followers_count": {"$gt": self.max_followers}}, {"_id": 0, "id": 1}
+            )
+        }
+        if celebrities:
+            await self.db.users.update_many({"id": {"$in": list(celebrities)}}, {"$set": {"fanout_on_read": True}})
+
+        pending: List[dict] = []
+        async for row in self.db.posts.aggregate([{"$group": {"_id": "$author_id"}}]):
+            pending += self._entries(row["_id"], await self._latest_posts(row["_id"]))
+            if len(pending) >= self.batch_size:
+                await self._insert(pending)
+                pending = []
+
+        followee_id, posts = None, []
+        edges = self.db.follows.find({}, {"_id": 0, "follower_id": 1, "followee_id": 1}).sort("followee_id", 1)
+        async for edge in edges:
+            if edge["followee_id"] != followee_id:
+                followee_id = edge["followee_id"]
+                posts = [] if followee_id in celebrities else await self._latest_posts(followee_id)
+            pending += self._entries(edge["follower_id"], posts)
+            if len(pending) >= self.batch_size:
+                await self._insert(pending)
+                pending = []
+        if pending:
+            await self._insert(pending)
+        self._celebrities_loaded_at = None
+        return self.entries_written - written
+
+    def followed(self, follower_id: str, followee_id: str) -> None:
+        """Seed the follower's timeline with the followee's latest posts."""
+        if self.cache:
+            self.cache.invalidate_user(follower_id)
+        self._spawn(self._backfill(follower_id, followee_id))
+
+    async def unfollowed(self, follower_id: str, followee_id: str) -> None:
+        await self.timelines.delete_many({"owner_id": follower_id, "author_id": followee_id})
+        if self.cache:
+            self.cache.invalidate_user(follower_id)
+
+    async def celebrities(self) -> Set[str]:
+        now = time.monotonic()
+        if self._celebrities_loaded_at is None or now - self._celebrities_loaded_at > self.celebrity_ttl:
+            docs = await self.db.users.find({"fanout_on_read": True}, {"_id": 0, "id": 1}).to_list(None)
+            self._celebrities = {doc["id"] for doc in docs}
+            self._celebrities_loaded_at = now
+        return self._celebrities
+
+    async def _followed_celebrities(self, owner_id: str) -> Set[str]:
+        celebrities = await self.celebrities()
+        if not celebrities:
+            return set()
+        return await self.graph.followed_among(owner_id, celebrities)
+
+    async def _page_keys(self, owner_id: str, limit: int, cursor: Optional[str], pulled: Set[str]) -> List[dict]:
+        entries = await self.timelines.find(
+            apply_cursor({"owner_id": owner_id}, TIMELINE_SORT, cursor),
+            {"_id": 0, "post_id": 1, "created_at": 1}
+        ).sort(TIMELINE_SORT).limit(limit).to_list(limit)
+        keys = [{"id": e["post_id"], "created_at": e["created_at"]} for e in entries]
+
+        # Fan-out-on-read para contas com muitos seguidores
+        if pulled:
+            keys += await self.db.posts.find(
+                apply_cursor({"author_id": {"$in": list(pulled)}}, FEED_SORT, cursor),
+                {"_id": 0, "id": 1, "created_at": 1}
+            ).sort(FEED_SORT).limit(limit).to_list(limit)
+
+        keys.sort(key=lambda k: (k["created_at"], k["id"]), reverse=True)
+        return list({k["id"]: k for k in keys}.values())[:limit]
+
+    async def _posts(self, post_ids: List[str], projection: Optional[dict]) -> Dict[str, dict]:
+        if not self.cache or projection is not None:
+            posts = await self.db.posts.find({"id": {"$in": post_ids}}, projection).to_list(None)
+            return {post["id"]: post for post in posts if "id" in post}
+
+        by_id, missing = self.cache.get_posts(post_ids)
+        if missing:
+            posts = await self.db.posts.find({"id": {"$in": missing}}).to_list(None)
+            self.cache.set_posts(posts)
+            by_id.update((post["id"], post) for post in posts)
+        return by_id
+
+    async def read(self, owner_id: str, limit: int = 20, cursor: Optional[str] = None,
+                   projection: Optional[dict] = None) -> dict:
+        """One page of the home feed: ``{"items": [...posts], "next_cursor": ...}``.
+
+        Raises ValueError for a malformed cursor.
+        """
+        cached = self.cache.page(owner_id, limit, cursor) if self.cache else None
+        if cached is not None:
+            keys = [{"created_at": created_at, "id": post_id} for created_at, post_id in cached]
+        elif self.cache and not cursor:
+            # Primeira página fora do cache: carrega o anel inteiro do usuário de uma vez
+            pulled = await self._followed_celebrities(owner_id)
+            ring = await self._page_keys(owner_id, self.cache.size_per_user, None, pulled)
+            self.cache.load(
+                owner_id,
+                [(k["created_at"], k["id"]) for k in ring],
+                complete=len(ring) < self.cache.size_per_user,
+                authors=pulled,
+            )
+            keys = ring[:limit]
+        else:
+            keys = await self._page_keys(owner_id, limit, cursor, await self._followed_celebrities(owner_id))
+
+        by_id = await self._posts([k["id"] for k in keys], projection)
+        return {
+            # Posts apagados somem da página, mas o cursor continua a partir das entradas
+            "items": [by_id[k["id"]] for k in keys if k["id"] in by_id],
+            "next_cursor": next_cursor(keys, FEED_SORT, limit),
+        }
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Wait for in-flight fan-outs (called on shutdown)."""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    async def create_indexes(self) -> None:
+        await self.timelines.create_index([("owner_id", 1)] + TIMELINE_SORT, unique=True)
+        await self.timelines.create_index([("owner_id", 1), ("author_id", 1)])
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "fanouts": self.fanouts,
+            "entries_written": self.entries_written,
+            "skipped_celebrity": self.skipped_celebrity,
+            "celebrities": len(self._celebrities),
+            "errors": self.errors,
+        }
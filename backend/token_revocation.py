@@ -0,0 +1,53 @@
+import time
+from datetime import datetime
+from typing import Dict
+
+from pymongo.errors import DuplicateKeyError
+
+
+class TokenRevocationList:
+    """Revoked refresh-token ids, stored compactly in Mongo plus an in-memory deny-set.
+
+    Each revoked jti is a single ``{_id: jti, expires_at}`` document; a TTL
+    index on ``expires_at`` drops it once the token would have expired anyway.
+    Inserting the jti is also how a refresh token is consumed: the ``_id``
+    uniqueness makes rotation single-use even under concurrent refreshes.
+    """
+
+    def __init__(self, collection, max_local: int = 100000):
+        self.collection = collection
+        self.max_local = max_local
+        self._denied: Dict[str, float] = {}
+
+    def _remember(self, jti: str, expires_at: datetime) -> None:
+        now = time.time()
+        if len(self._denied) >= self.max_local:
+            self._denied = {k: exp for k, exp in self._denied.items() if exp > now}
+            if len(self._denied) >= self.max_local:
+                # Still full of live entries: Mongo remains the source of truth
+                self._denied.pop(next(iter(self._denied)))
+        self._denied[jti] = now + (expires_at - datetime.utcnow()).total_seconds()
+
+    def is_denied_locally(self, jti: str) -> bool:
+        expires_at = self._denied.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._denied[jti]
+            return False
+        return True
+
+    async def revoke(self, jti: str, expires_at: datetime) -> bool:
+        """Revoke ``jti``; returns False if it had already been revoked."""
+        if self.is_denied_locally(jti):
+            return False
+        try:
+            await self.collection.insert_one({"_id": jti, "expires_at": expires_at})
+        except DuplicateKeyError:
+            self._remember(jti, expires_at)
+            return False
+        self._remember(jti, expires_at)
+        return True
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
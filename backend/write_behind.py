@@ -0,0 +1,217 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+class WriteBehindBuffer(ABC):
+    """Base for in-memory write buffers flushed to Mongo in the background.
+
+    Subclasses accumulate updates in memory and implement ``_drain`` (take the
+    pending batch) and ``_write`` (persist it). A batch is flushed every
+    ``interval`` seconds, as soon as ``max_pending`` entries are buffered, and
+    once more on shutdown. After a failed write, early flushes wait for the
+    next interval instead of retrying on every new entry.
+    """
+
+    def __init__(self, interval: float = 1.0, max_pending: int = 5000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._early_flush: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.errors = 0
+        self.dropped = 0
+        self._failed_at = 0.0
+
+    @abstractmethod
+    def pending(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _drain(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _write(self, batch) -> None:
+        raise NotImplementedError
+
+    def _restore(self, batch) -> None:
+        """Put the unwritten part of a failed batch back into the buffer (default: drop it)."""
+
+    def _entry_added(self) -> None:
+        if self.pending() >= self.max_pending and self._task is not None:
+            if time.monotonic() - self._failed_at < self.interval:
+                return
+            if self._early_flush is None or self._early_flush.done():
+                self._early_flush = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self.pending():
+                return
+            batch = self._drain()
+            size = len(batch)
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self.errors += 1
+                self._failed_at = time.monotonic()
+                self._restore(batch)
+                print(f"Erro ao gravar {type(self).__name__}: {str(e)}")
+                return
+            self.flushes += 1
+            self.flushed_entries += size
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "interval_seconds": self.interval,
+            "max_pending": self.max_pending,
+            "flushes": self.flushes,
+            "flushed_entries": self.flushed_entries,
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
+
+
+class ActivityTracker(WriteBehindBuffer):
+    """Coalesces ``last_active`` updates for users and companies.
+
+    Only the latest timestamp per principal is kept, so any number of
+    requests between two flushes costs a single ``$max`` update.
+    """
+
+    def __init__(self, users, companies, interval: float = 1.0, max_pending: int = 5000):
+        super().__init__(interval=interval, max_pending=max_pending)
+        self.users = users
+        self.companies = companies
+        self._last_seen: Dict[Tuple[bool, str], datetime] = {}
+
+    def record(self, principal_id: str, is_company: bool = False, when: Optional[datetime] = None) -> None:
+        self._last_seen[(bool(is_company), principal_id)] = when or datetime.utcnow()
+        self._entry_added()
+
+    def pending(self) -> int:
+        return len(self._last_seen)
+
+    def _drain(self):
+        batch, self._last_seen = self._last_seen, {}
+        return batch
+
+    async def _write(self, batch) -> None:
+        user_ops, company_ops = [], []
+        for (is_company, principal_id), seen_at in batch.items():
+            op = UpdateOne({"id": principal_id}, {"$max": {"last_active": seen_at}})
+            (company_ops if is_company else user_ops).append(op)
+
+        if user_ops:
+            await self.users.bulk_write(user_ops, ordered=False)
+        if company_ops:
+            await self.companies.bulk_write(company_ops, ordered=False)
+
+
+class ViewCounter(WriteBehindBuffer):
+    """Aggregates ``views`` increments per target document in memory.
+
+    Every view of the same document between two flushes collapses into one
+    ``$inc`` inside an unordered ``bulk_write`` per collection.
+
+    Bounded loss: increments live only in this process until flushed. A
+    graceful shutdown flushes them; a hard crash loses what was received
+    since the last successful flush. Reaching ``max_pending`` distinct
+    targets triggers an immediate flush, and a failed write puts its
+    increments back for the next attempt. While Mongo keeps failing the
+    buffer grows up to ``max_buffered`` targets (10 x ``max_pending``);
+    beyond that increments for new targets are dropped and counted in
+    ``stats()["dropped"]``, so an outage costs bounded memory. Tune via
+    VIEW_FLUSH_SECONDS / VIEW_MAX_PENDING.
+
+    ``derived`` maps a collection to extra pipeline stages run after the
+    increment, for fields computed from the view count (e.g. hot_score).
+    """
+
+    def __init__(self, db, interval: float = 2.0, max_pending: int = 1000, field: str = "views",
+                 derived: Optional[Dict[str, list]] = None):
+        super().__init__(interval=interval, max_pending=max_pending)
+        self.db = db
+        self.field = field
+        self.derived = derived or {}
+        self.max_buffered = max_pending * 10
+        self._counts: Dict[Tuple[str, str, object], int] = {}
+
+    def _fold(self, key, amount: int) -> None:
+        if key in self._counts:
+            self._counts[key] += amount
+        elif len(self._counts) < self.max_buffered:
+            self._counts[key] = amount
+        else:
+            self.dropped += 1
+
+    def add(self, collection: str, target_id, key_field: str = "id", amount: int = 1) -> None:
+        self._fold((collection, key_field, target_id), amount)
+        self._entry_added()
+
+    def pending(self) -> int:
+        return len(self._counts)
+
+    def _drain(self):
+        batch, self._counts = self._counts, {}
+        return batch
+
+    def _restore(self, batch) -> None:
+        for key, amount in batch.items():
+            self._fold(key, amount)
+
+    def _operations(self, batch) -> Dict[str, Tuple[list, list]]:
+        operations: Dict[str, Tuple[list, list]] = {}
+        for key, amount in batch.items():
+            collection, key_field, target_id = key
+            keys, ops = operations.setdefault(collection, ([], []))
+            keys.append(key)
+            if collection in self.derived:
+                added = {"$add": [{"$ifNull": [f"${self.field}", 0]}, amount]}
+                update = [{"$set": {self.field: added}}] + self.derived[collection]
+            else:
+                update = {"$inc": {self.field: amount}}
+            ops.append(UpdateOne({key_field: target_id}, update))
+        return operations
+
+    async def _write(self, batch) -> None:
+        # Written keys are removed from the batch so a failure only restores the rest
+        for collection, (keys, ops) in self._operations(batch).items():
+            try:
+                await self.db[collection].bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                for index, key in enumerate(keys):
+                    if index not in failed:
+                        del batch[key]
+                raise
+            for key in keys:
+                del batch[key]
@@ -9,6 +9,9 @@ import os
 from dotenv import load_dotenv
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from profiles import split_profile
+
 # Load environment variables
 load_dotenv('backend/.env')
 
@@ -53,12 +56,15 @@ async def create_test_users():
                 "skills": ["Python", "JavaScript", "MongoDB"],
                 "experience": "Administrador do sistema",
                 "portfolio_projects": [],
-                "following": [],
-                "followers": [],
+                "following_count": 0,
+                "followers_count": 0,
                 "achievements": ["first_join", "admin_privileges"]
             }
             
+            # Campos de perfil vão para user_profiles, como no registro pela API
+            profile = split_profile(admin_user)
             await db.users.insert_one(admin_user)
+            await db.user_profiles.insert_one({"user_id": admin_user["id"], **profile})
             print("✅ Usuário admin criado com sucesso!")
             print(f"   Email: admin@teste.com")
             print(f"   Senha: Admin123!")
@@ -88,12 +94,15 @@ async def create_test_users():
                 "skills": ["JavaScript", "React"],
                 "experience": "Desenvolvedor iniciante",
                 "portfolio_projects": [],
-                "following": [],
-                "followers": [],
+                "following_count": 0,
+                "followers_count": 0,
                 "achievements": ["first_join"]
             }
             
+            # Campos de perfil vão para user_profiles, como no registro pela API
+            profile = split_profile(normal_user)
             await db.users.insert_one(normal_user)
+            await db.user_profiles.insert_one({"user_id": normal_user["id"], **profile})
             print("✅ Usuário normal criado com sucesso!")
             print(f"   Email: usuario@teste.com")
             print(f"   Senha: Usuario123!")